@@ -4,6 +4,8 @@ from collections import defaultdict
 import random
 import time
 
+import numpy
+
 from improb import PSpace
 from improb.setfunction import SetFunction
 
@@ -28,7 +30,31 @@ def timeit(n=10, m=10):
         s.get_choquet(gamble)
     return time.clock() - t
 
+def timeit_many(n=10, m=10, number_type='float'):
+    k = 10000 # number of gambles, all integrated in a single call
+
+    matrix = numpy.random.randint(1, m + 1, size=(k, n))
+
+    pspace = PSpace(n)
+    s = SetFunction(
+        pspace=pspace,
+        number_type=number_type,
+        dense=True)
+    array = s.as_array()
+    for mask in xrange(len(array)):
+        array[mask] = s.make_number(random.randint(-n, n))
+
+    t = time.clock()
+    s.get_choquet_many(matrix)
+    return time.clock() - t
+
 for n in [2, 8, 32, 256]:
     for m in [1, 2, 4, 8, 32, 256, 65536]:
         print("n={0:<3} m={1:<5} t={2:<5.3g}"
               .format(n, m, timeit(n, m)))
+
+for number_type in ['float', 'fraction']:
+    for n in [2, 8, 16]:
+        for m in [1, 8, 65536]:
+            print("{0:<8} many n={1:<3} m={2:<5} t={3:<5.3g}"
+                  .format(number_type, n, m, timeit_many(n, m, number_type)))
@@ -0,0 +1,55 @@
+# benchmark script for linear programming solvers
+
+import random
+import time
+
+from improb import PSpace
+import improb.linprog
+from improb.lowprev.lowpoly import LowPoly
+
+def make_problems(n=10, m=100, k=20):
+    """Return the constraint matrix of a random lower prevision with *m*
+    assessments on a possibility space of size *n*, and *k* random
+    objective functions.
+    """
+    pspace = PSpace(n)
+    lpr = LowPoly(pspace=pspace, number_type='float')
+    # assessments of a random probability mass function make sure
+    # that the lower prevision avoids sure loss
+    prob = [random.random() for omega in pspace]
+    prob = [p / sum(prob) for p in prob]
+    for i in xrange(m):
+        gamble = [random.randint(-5, 5) for omega in pspace]
+        lpr.set_lower(
+            gamble, sum(p * x for p, x in zip(prob, gamble)) - random.random())
+    matrix = lpr.get_matrix()
+    obj_funcs = [[0] + [random.randint(-5, 5) for omega in pspace]
+                 for j in xrange(k)]
+    return matrix, obj_funcs
+
+def timeit(matrix, obj_funcs, solver):
+    solver = improb.linprog.make_solver(solver, matrix.number_type)
+    values = []
+    t = time.clock()
+    for obj_func in obj_funcs:
+        matrix.obj_func = obj_func
+        values.append(solver.solve(matrix).obj_value)
+    return time.clock() - t, values
+
+solvers = ['cdd']
+if improb.linprog.numpy is not None:
+    solvers.append('numpy')
+if improb.linprog.scipy is not None:
+    solvers.append('scipy')
+
+for n in [5, 20, 50]:
+    for m in [10, 100, 1000]:
+        matrix, obj_funcs = make_problems(n, m)
+        reference = None
+        for solver in solvers:
+            t, values = timeit(matrix, obj_funcs, solver)
+            if reference is None:
+                reference = values
+            error = max(abs(x - y) for x, y in zip(values, reference))
+            print("n={0:<3} m={1:<5} {2:<6} t={3:<8.3g} error={4:.3g}"
+                  .format(n, m, solver, t, error))
@@ -28,6 +28,13 @@ import collections
 import fractions
 import itertools
 import numbers
+import operator
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from improb.scaled import ScaledTuple
 
 def _str_keys_values(keys, values):
     """Turn dictionary with *keys* and *values* into a string.
@@ -101,13 +108,36 @@ class PSpace(collections.Set, collections.Hashable):
 
            >>> list(PSpace([2, 2, 5, 3, 9, 5, 1, 2]))
            [2, 5, 3, 9, 1]
+
+        A product space keeps its factors (see :attr:`factors`), and
+        only constructs the tuple of its elements when it is iterated
+        over. Looking up an element, or the element at an index,
+        takes a number of operations proportional to the number of
+        factors:
+
+        .. doctest::
+
+           >>> pspace = PSpace(xrange(1000), xrange(1000), 'abcde')
+           >>> len(pspace)
+           5000000
+           >>> (999, 0, 'e') in pspace
+           True
+           >>> pspace[4999999]
+           (999, 999, 'e')
         """
+        self._tuple = None
+        self._factors = None
         if not args:
             raise ValueError('specify at least one argument')
         elif len(args) == 1:
             arg = args[0]
-            if isinstance(arg, int):
-                self._data = tuple(xrange(arg))
+            if isinstance(arg, PSpace):
+                self._tuple = arg._tuple
+                self._factors = arg._factors
+                self._positions = arg._positions
+                return
+            elif isinstance(arg, int):
+                self._tuple = tuple(xrange(arg))
             elif isinstance(arg, collections.Iterable):
                 # rationale for removing duplicates: if elem is not in
                 # added, then added.add(elem) is executed and the
@@ -116,15 +146,136 @@ class PSpace(collections.Set, collections.Hashable):
                 # expression returns False (and added.add(elem) is not
                 # executed)
                 added = set()
-                self._data = tuple(
+                self._tuple = tuple(
                     elem for elem in arg
                     if elem not in added and not added.add(elem))
             else:
                 raise TypeError(
                     'specify possibility space as iterable or integer')
         else:
-            self._data = tuple(
-                itertools.product(*[PSpace(arg) for arg in args]))
+            self._factors = tuple(PSpace(arg) for arg in args)
+            self._positions = _ProductPositions(self._factors)
+            return
+        # position of every element, which also determines the bit
+        # used for that element in the mask of an event
+        self._positions = dict(
+            (omega, index) for index, omega in enumerate(self._tuple))
+
+    @property
+    def _data(self):
+        """The elements, as a tuple. For product spaces, this tuple is
+        only constructed when needed.
+        """
+        if self._tuple is None:
+            self._tuple = tuple(itertools.product(*self._factors))
+        return self._tuple
+
+    def _has_same_order(self, other):
+        """Do *self* and *other* have the same elements in the same
+        order? Product spaces are compared factor by factor.
+        """
+        if self is other:
+            return True
+        if self._factors is not None and other._factors is not None:
+            return (len(self._factors) == len(other._factors)
+                    and all(factor._has_same_order(other_factor)
+                            for factor, other_factor
+                            in itertools.izip(self._factors,
+                                              other._factors)))
+        return self._data == other._data
+
+    @property
+    def factors(self):
+        """The factor spaces of a product space, as a tuple, or
+        :const:`None` if the space is not a product space.
+
+        >>> PSpace(2, 'ab').factors
+        (PSpace(2), PSpace(['a', 'b']))
+        >>> PSpace('ab').factors is None
+        True
+        """
+        return self._factors
+
+    def _get_cylinder_mask(self, index, mask):
+        """Mask of the cylinder event of the *index*-th factor, for
+        the event of that factor with the given *mask*.
+        """
+        # elements are in row-major order: every block of
+        # len(factor) * stride elements runs over all elements of the
+        # factor, each repeated stride times
+        factor = self._factors[index]
+        stride = self._positions._strides[index]
+        run = (1 << stride) - 1
+        block = 0
+        while mask:
+            lowest = mask & -mask
+            block |= run << ((lowest.bit_length() - 1) * stride)
+            mask ^= lowest
+        block_size = len(factor) * stride
+        # repeat the block, there are no carries as blocks do not overlap
+        return block * (((1 << len(self)) - 1) // ((1 << block_size) - 1))
+
+    def get_cylinder(self, index, event, name=None):
+        """The cylinder event of an event of one of the factors of a
+        product space: all elements whose *index*-th component belongs
+        to *event*.
+
+        :param index: The index of the factor.
+        :type index: :class:`int`
+        :param event: The event on the factor space.
+        :type event: |eventtype|
+        :param name: The name of the event (used for pretty printing).
+        :type name: :class:`str`
+        :return: The cylinder event.
+        :rtype: :class:`Event`
+
+        >>> pspace = PSpace(2, 'abc')
+        >>> print(pspace.get_cylinder(1, 'ac'))
+        (0, 'a') : 1
+        (0, 'b') : 0
+        (0, 'c') : 1
+        (1, 'a') : 1
+        (1, 'b') : 0
+        (1, 'c') : 1
+        >>> pspace.get_cylinder(0, [1]) == pspace.make_event([1], 'abc')
+        True
+        """
+        if self._factors is None:
+            raise ValueError("not a product space")
+        event = self._factors[index].make_event(event)
+        return Event.from_mask(
+            self, self._get_cylinder_mask(index, event.mask), name=name)
+
+    def get_marginal(self, index, event):
+        """The marginal of an event of a product space on one of its
+        factors: all elements of the *index*-th factor which are the
+        *index*-th component of some element of *event*.
+
+        :param index: The index of the factor.
+        :type index: :class:`int`
+        :param event: The event on the product space.
+        :type event: |eventtype|
+        :return: The marginal event.
+        :rtype: :class:`Event`
+
+        >>> pspace = PSpace(2, 'abc')
+        >>> print(pspace.get_marginal(1, [(0, 'a'), (1, 'c')]))
+        a : 1
+        b : 0
+        c : 1
+        >>> print(pspace.get_marginal(0, [(0, 'a'), (0, 'c')]))
+        0 : 1
+        1 : 0
+        """
+        if self._factors is None:
+            raise ValueError("not a product space")
+        event = self.make_event(event)
+        factor = self._factors[index]
+        mask = 0
+        for position in xrange(len(factor)):
+            if event.mask & self._get_cylinder_mask(index, 1 << position):
+                mask |= 1 << position
+        return Event.from_mask(factor, mask)
 
     @classmethod
     def make(cls, pspace):
@@ -180,6 +331,10 @@ class PSpace(collections.Set, collections.Hashable):
             if isinstance(event, Event):
                 if self != event.pspace:
                     raise ValueError('possibility space mismatch')
+                if not self._has_same_order(event.pspace):
+                    # same elements but different order: bits must be
+                    # reassigned
+                    return Event(self, event, name=event.name)
                 return event
             elif event is True:
                 return Event(self, event, name=name)
@@ -196,6 +351,13 @@ class PSpace(collections.Set, collections.Hashable):
                              name=name)
             else:
                 return Event(self, event, name=name)
+        elif self._factors is not None and len(args) == len(self._factors):
+            # intersection of cylinders
+            mask = (1 << len(self)) - 1
+            for index, arg in enumerate(args):
+                mask &= self._get_cylinder_mask(
+                    index, self._factors[index].make_event(arg).mask)
+            return Event.from_mask(self, mask, name=name)
         else:
             return Event(self, itertools.product(*args), name=name)
 
@@ -280,19 +442,107 @@ class PSpace(collections.Set, collections.Hashable):
             return Gamble(self, gamble, number_type=number_type)
 
     def __len__(self):
-        return len(self._data)
+        if self._tuple is None:
+            return len(self._positions)
+        return len(self._tuple)
 
     def __contains__(self, omega):
-        return omega in self._data
+        try:
+            return omega in self._positions
+        except TypeError:
+            # unhashable, so cannot be an element
+            return False
+
+    def index(self, omega):
+        """Position of an element in the possibility space. This
+        position also determines the bit used for the element in the
+        mask of an event (see :attr:`Event.mask`). Lookups take
+        constant time (or time proportional to the number of factors,
+        for product spaces).
+
+        :param omega: The element.
+        :return: The position.
+        :rtype: :class:`int`
+        :raises: :exc:`~exceptions.ValueError` if *omega* is not an
+            element of the possibility space
+
+        >>> PSpace('abc').index('c')
+        2
+        >>> PSpace(2, 'abc').index((1, 'a'))
+        3
+        >>> PSpace('abc').index('d')
+        Traceback (most recent call last):
+            ...
+        ValueError: 'd' is not in possibility space
+        """
+        try:
+            return self._positions[omega]
+        except (KeyError, TypeError):
+            raise ValueError(
+                "{0!r} is not in possibility space".format(omega))
 
     def __getitem__(self, index):
+        if self._tuple is None and not isinstance(index, slice):
+            # find components without constructing all elements
+            size = len(self)
+            if index < 0:
+                index += size
+            if not 0 <= index < size:
+                raise IndexError("possibility space index out of range")
+            omega = []
+            for factor, stride in itertools.izip(
+                self._factors, self._positions._strides):
+                position, index = divmod(index, stride)
+                omega.append(factor[position])
+            return tuple(omega)
         return self._data[index]
 
     def __iter__(self):
         return iter(self._data)
 
     def __hash__(self):
-        return hash(self._data)
+        """The hash only depends on the size and on a few elements, so
+        hashing a product space does not construct all elements, and
+        a product space hashes like its flat copy.
+
+        >>> pspace = PSpace(xrange(300), xrange(300), 'abcde')
+        >>> event = pspace.make_event([(0, 0, 'a'), (299, 299, 'e')])
+        >>> event in set([event])
+        True
+        >>> hash(pspace) == hash(PSpace(xrange(300), xrange(300), 'abcde'))
+        True
+        >>> pspace._tuple is None
+        True
+        >>> flat = PSpace(list(PSpace(2, 'ab')))
+        >>> flat == PSpace(2, 'ab') and hash(flat) == hash(PSpace(2, 'ab'))
+        True
+        >>> len(set([flat, PSpace(2, 'ab')]))
+        1
+        >>> gamble = Gamble(PSpace(2, 'ab'), [1, 2, 3, 4])
+        >>> hash(gamble) == hash(Gamble(flat, [1, 2, 3, 4]))
+        True
+        """
+        # implementation detail: this is cached in _cached_hash
+        # (collections.Set already has a _hash method), as events and
+        # gambles hash their possibility space
+        try:
+            return self._cached_hash
+        except AttributeError:
+            size = len(self)
+            if size:
+                self._cached_hash = hash(
+                    (size, self[0], self[size // 2], self[size - 1]))
+            else:
+                self._cached_hash = hash(size)
+            return self._cached_hash
+
+    def __eq__(self, other):
+        if isinstance(other, PSpace) and self._has_same_order(other):
+            return True
+        return collections.Set.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
 
     def __repr__(self):
         """
@@ -314,8 +564,10 @@ class PSpace(collections.Set, collections.Hashable):
         return " ".join(str(omega) for omega in self)
 
     def subsets(self, event=True, empty=True, full=True,
-                size=None, contains=False):
-        r"""Iterates over all subsets of the possibility space.
+                size=None, contains=False, order='cardinality'):
+        r"""Iterates over all subsets of the possibility space. See
+        :meth:`subset_masks` for the order, and for iterating without
+        constructing events.
 
         :param event: An event (optional).
         :type event: |eventtype|
@@ -329,6 +581,8 @@ class PSpace(collections.Set, collections.Hashable):
         :param contains: An event that must be contained in all
             returned subsets.
         :type contains: |eventtype|
+        :param order: The order, see :meth:`subset_masks`.
+        :type order: :class:`str`
         :returns: Yields all subsets.
         :rtype: Iterator of :class:`Event`.
 
@@ -406,11 +660,66 @@ class PSpace(collections.Set, collections.Hashable):
         4 : 1
         5 : 1
         """
+        for mask in self.subset_masks(event=event, empty=empty, full=full,
+                                      size=size, contains=contains,
+                                      order=order):
+            yield Event.from_mask(self, mask)
+
+    def subset_masks(self, event=True, empty=True, full=True,
+                     size=None, contains=False, order='cardinality'):
+        """Iterates over the masks of all subsets of the possibility
+        space (see :attr:`Event.mask`), without constructing
+        events. The arguments are as for :meth:`subsets`.
+
+        Two orders are supported:
+
+        * ``'cardinality'``: by increasing size (not counting the
+          elements of *contains*), and subsets of equal size in
+          lexicographic order of the positions of their elements.
+          This is the order of :meth:`rank_subset_mask`.
+
+        * ``'gray'``: in binary reflected Gray code order, so
+          consecutive subsets differ in exactly one element; *size*
+          is not supported for this order.
+
+        >>> pspace = PSpace('abc')
+        >>> list(pspace.subset_masks())
+        [0, 1, 2, 4, 3, 5, 6, 7]
+        >>> list(pspace.subset_masks(order='gray'))
+        [0, 1, 3, 2, 6, 7, 5, 4]
+        >>> list(pspace.subset_masks('ac', size=1))
+        [1, 4]
+        >>> list(pspace.subset_masks(contains='b', empty=False, order='gray'))
+        [3, 7, 6]
+        """
         event = self.make_event(event)
         contains = self.make_event(contains)
-        if not(contains <= event):
+        if contains.mask & ~event.mask:
             # nothing to iterate over!!
             return
+        free = event.mask & ~contains.mask
+        bits = []
+        while free:
+            lowest = free & -free
+            bits.append(lowest)
+            free ^= lowest
+        if order == 'gray':
+            if size is not None:
+                raise ValueError("gray order does not support size")
+            mask = contains.mask
+            subset_size = 0
+            for rank in xrange(1 << len(bits)):
+                if rank:
+                    # flip the bit at the number of trailing zeros
+                    bit = bits[(rank & -rank).bit_length() - 1]
+                    mask ^= bit
+                    subset_size += 1 if mask & bit else -1
+                if ((empty or subset_size)
+                    and (full or subset_size != len(event))):
+                    yield mask
+            return
+        elif order != 'cardinality':
+            raise ValueError("invalid order '{0}'".format(order))
         if size is None:
             size_range = xrange(0 if empty else 1,
                                 len(event) + (1 if full else 0))
@@ -421,8 +730,165 @@ class PSpace(collections.Set, collections.Hashable):
         else:
             raise TypeError('invalid size')
         for subset_size in size_range:
-            for subset in itertools.combinations(event - contains, subset_size):
-                yield Event(self, subset) | contains
+            for combination in itertools.combinations(bits, subset_size):
+                yield sum(combination, contains.mask)
+
+    def _get_event_bits(self, event):
+        """The single bit masks of the elements of *event*, in order
+        of position.
+        """
+        mask = self.make_event(event).mask
+        bits = []
+        while mask:
+            lowest = mask & -mask
+            bits.append(lowest)
+            mask ^= lowest
+        return bits
+
+    def rank_subset_mask(self, mask, event=True, order='cardinality'):
+        """The position of a subset of *event*, given by its mask, in
+        the iteration over all subsets of *event* in the given order
+        (see :meth:`subset_masks`). This allows values indexed by
+        subsets to be stored in an array, without constructing any
+        events.
+
+        :param mask: The mask of the subset.
+        :type mask: :class:`int`
+        :param event: An event (optional).
+        :type event: |eventtype|
+        :param order: The order, see :meth:`subset_masks`.
+        :type order: :class:`str`
+        :return: The rank.
+        :rtype: :class:`int`
+
+        >>> pspace = PSpace('abcd')
+        >>> all(pspace.rank_subset_mask(mask, order=order) == rank
+        ...     for order in ['cardinality', 'gray']
+        ...     for rank, mask in enumerate(pspace.subset_masks(order=order)))
+        True
+        >>> pspace.rank_subset_mask(0b1010, event='bd')
+        3
+        """
+        bits = self._get_event_bits(event)
+        if mask & ~sum(bits):
+            raise ValueError("not a subset of the event")
+        # local positions of the elements of the subset
+        local = [index for index, bit in enumerate(bits) if mask & bit]
+        if order == 'gray':
+            gray = sum(1 << index for index in local)
+            rank = gray
+            while gray:
+                gray >>= 1
+                rank ^= gray
+            return rank
+        elif order != 'cardinality':
+            raise ValueError("invalid order '{0}'".format(order))
+        num = len(bits)
+        size = len(local)
+        # all smaller subsets come first
+        rank = sum(_choose(num, smaller_size) for smaller_size in xrange(size))
+        # lexicographic rank among subsets of the same size
+        return rank + _choose(num, size) - 1 - sum(
+            _choose(num - 1 - index, size - i)
+            for i, index in enumerate(local))
+
+    def unrank_subset_mask(self, rank, event=True, order='cardinality'):
+        """The mask of the subset of *event* at the given position in
+        the iteration over all subsets of *event* in the given order;
+        this is the inverse of :meth:`rank_subset_mask`.
+
+        :param rank: The rank.
+        :type rank: :class:`int`
+        :param event: An event (optional).
+        :type event: |eventtype|
+        :param order: The order, see :meth:`subset_masks`.
+        :type order: :class:`str`
+        :return: The mask of the subset.
+        :rtype: :class:`int`
+
+        >>> pspace = PSpace('abcd')
+        >>> all(pspace.unrank_subset_mask(rank, order=order) == mask
+        ...     for order in ['cardinality', 'gray']
+        ...     for rank, mask in enumerate(pspace.subset_masks(order=order)))
+        True
+        >>> print(Event.from_mask(pspace, pspace.unrank_subset_mask(3, event='bd')))
+        a : 0
+        b : 1
+        c : 0
+        d : 1
+        """
+        bits = self._get_event_bits(event)
+        num = len(bits)
+        if not 0 <= rank < (1 << num):
+            raise IndexError("subset rank out of range")
+        if order == 'gray':
+            gray = rank ^ (rank >> 1)
+            return sum(bit for index, bit in enumerate(bits)
+                       if (gray >> index) & 1)
+        elif order != 'cardinality':
+            raise ValueError("invalid order '{0}'".format(order))
+        # find the size
+        size = 0
+        while rank >= _choose(num, size):
+            rank -= _choose(num, size)
+            size += 1
+        # find the elements, in lexicographic order
+        mask = 0
+        index = 0
+        for i in xrange(size):
+            while True:
+                count = _choose(num - 1 - index, size - 1 - i)
+                if rank < count:
+                    break
+                rank -= count
+                index += 1
+            mask |= bits[index]
+            index += 1
+        return mask
+
+def _choose(n, k):
+    """Binomial coefficient, zero if *k* is out of range."""
+    if not 0 <= k <= n:
+        return 0
+    result = 1
+    for i in xrange(min(k, n - k)):
+        result = result * (n - i) // (i + 1)
+    return result
+
+class _ProductPositions(collections.Mapping):
+    """Positions of the elements of a product space, in row-major
+    order, calculated from the positions of their components.
+    """
+
+    def __init__(self, factors):
+        self._factors = factors
+        self._factor_positions = tuple(
+            factor._positions for factor in factors)
+        strides = []
+        stride = 1
+        for factor in reversed(factors):
+            strides.append(stride)
+            stride *= len(factor)
+        self._strides = tuple(reversed(strides))
+        self._size = stride
+
+    def __getitem__(self, omega):
+        if not isinstance(omega, tuple) or len(omega) != len(self._strides):
+            raise KeyError(omega)
+        index = 0
+        try:
+            for positions, stride, component in itertools.izip(
+                self._factor_positions, self._strides, omega):
+                index += positions[component] * stride
+        except KeyError:
+            raise KeyError(omega)
+        return index
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return itertools.product(*self._factors)
 
 class Gamble(collections.Mapping, collections.Hashable, cdd.NumberTypeable):
     """An immutable gamble.
@@ -512,62 +978,153 @@ class Gamble(collections.Mapping, collections.Hashable, cdd.NumberTypeable):
             :func:`~cdd.get_number_type_from_sequences` is used to
             determine the number type.
         :type number_type: :class:`str`
+
+        Values are stored in the order of the possibility space. If
+        numpy is installed, then the values of a gamble with float
+        number type are stored in a read-only :class:`numpy.ndarray`,
+        and arithmetic is done on this array; see :meth:`as_array`.
+        The values of a gamble with fraction number type are stored
+        as integers over a common denominator, and arithmetic is done
+        on these integers; see :class:`~improb.scaled.ScaledTuple`.
         """
         self._pspace = PSpace.make(pspace)
-        if isinstance(data, collections.Mapping):
+        if (isinstance(data, Gamble)
+            and data._pspace._has_same_order(self._pspace)):
             if number_type is None:
-                cdd.NumberTypeable.__init__(
-                    self,
-                    cdd.get_number_type_from_sequences(data.itervalues()))
-            else:
-                cdd.NumberTypeable.__init__(self, number_type)
-            self._data = dict((omega, self.make_number(data.get(omega, 0)))
-                              for omega in self.pspace)
-        elif isinstance(data, collections.Sequence):
+                number_type = data.number_type
+            values = data._values
+        elif isinstance(data, collections.Mapping):
+            if number_type is None:
+                number_type = cdd.get_number_type_from_sequences(
+                    data.itervalues())
+            values = [data.get(omega, 0) for omega in self.pspace]
+        elif (isinstance(data, collections.Sequence)
+              or (numpy is not None and isinstance(data, numpy.ndarray))):
             if len(data) < len(self.pspace):
                 raise ValueError("data sequence too short")
             if number_type is None:
-                cdd.NumberTypeable.__init__(
-                    self,
-                    cdd.get_number_type_from_sequences(data))
-            else:
-                cdd.NumberTypeable.__init__(self, number_type)
-            self._data = dict((omega, self.make_number(value))
-                              for omega, value
-                              in itertools.izip(self.pspace, data))
+                number_type = cdd.get_number_type_from_sequences(data)
+            values = data[:len(self.pspace)]
         elif isinstance(data, numbers.Real):
             if number_type is None:
-                cdd.NumberTypeable.__init__(
-                    self,
-                    cdd.get_number_type_from_value(data))
-            else:
-                cdd.NumberTypeable.__init__(self, number_type)
-            self._data = dict((omega, self.make_number(data))
-                              for omega in self.pspace)
+                number_type = cdd.get_number_type_from_value(data)
+            values = [data] * len(self.pspace)
         else:
             raise TypeError('specify data as sequence or mapping')
+        cdd.NumberTypeable.__init__(self, number_type)
+        if self._is_array_type():
+            if not(isinstance(values, numpy.ndarray)
+                   and values.dtype == float):
+                values = [self.make_number(value) for value in values]
+            values = numpy.array(values, dtype=float)
+            values.flags.writeable = False
+        elif self._is_scaled_type():
+            if not isinstance(values, ScaledTuple):
+                values = ScaledTuple.from_values(
+                    self.make_number(value) for value in values)
+        else:
+            values = tuple(self.make_number(value) for value in values)
+        self._values = values
+
+    def _is_array_type(self):
+        """Are the values stored in a numpy array?"""
+        return numpy is not None and self.number_type == 'float'
+
+    def _is_scaled_type(self):
+        """Are the values stored in a
+        :class:`~improb.scaled.ScaledTuple`?
+        """
+        return self.number_type == 'fraction'
+
+    def _from_values(self, values):
+        """Construct a gamble with the same possibility space and
+        number type from *values*, which must already be stored in the
+        right way (a numpy array for :meth:`_is_array_type`, a
+        :class:`~improb.scaled.ScaledTuple` for :meth:`_is_scaled_type`,
+        a tuple otherwise).
+        """
+        gamble = Gamble.__new__(Gamble)
+        cdd.NumberTypeable.__init__(gamble, self.number_type)
+        gamble._pspace = self._pspace
+        if self._is_array_type():
+            values.flags.writeable = False
+        gamble._values = values
+        return gamble
 
     @property
     def pspace(self):
         """A :class:`~improb.PSpace` representing the possibility space."""
         return self._pspace
 
+    def as_array(self):
+        """Return the values as a :class:`numpy.ndarray`, in the order
+        of the possibility space. For the float number type, this is a
+        read-only view on the values of the gamble, so no copying is
+        involved. For the fraction number type, a new array with
+        dtype :class:`object` is returned.
+
+        >>> gamble = Gamble('abc', [1, 4, 8], number_type='float')
+        >>> list(gamble.as_array())
+        [1.0, 4.0, 8.0]
+        >>> gamble.as_array() is gamble.as_array()
+        True
+        """
+        if numpy is None:
+            raise ImportError("as_array requires numpy")
+        if self._is_array_type():
+            return self._values
+        return numpy.array(list(self._values), dtype=object)
+
     def __len__(self):
-        return len(self._data)
+        return len(self._values)
 
     def __iter__(self):
-        # preserve ordering of pspace! so not iter(self._data) but...
+        # preserve ordering of pspace!
         return iter(self._pspace)
 
     def __contains__(self, omega):
-        return omega in self._data
+        return omega in self._pspace._positions
 
     def __getitem__(self, omega):
-        return self._data[omega]
+        value = self._values[self._pspace._positions[omega]]
+        return float(value) if self._is_array_type() else value
+
+    def itervalues(self):
+        if self._is_array_type():
+            return iter(self._values.tolist())
+        return iter(self._values)
+
+    def iteritems(self):
+        return itertools.izip(self._pspace, self.itervalues())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
 
     def __hash__(self):
-        return hash((self._pspace,
-                     tuple(self._data[omega] for omega in self._pspace)))
+        # implementation detail: this is cached in _hash; python
+        # numbers are hashed so equal values of different number
+        # types get the same hash
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash((self._pspace, tuple(self.itervalues())))
+            return self._hash
+
+    def __eq__(self, other):
+        if (isinstance(other, Gamble)
+            and self._pspace._has_same_order(other._pspace)):
+            if self._is_array_type() and other._is_array_type():
+                return bool(numpy.array_equal(self._values, other._values))
+            if self._is_scaled_type() and other._is_scaled_type():
+                return self._values == other._values
+            return list(self.itervalues()) == list(other.itervalues())
+        return collections.Mapping.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
 
     def __repr__(self):
         """
@@ -606,25 +1163,35 @@ class Gamble(collections.Mapping, collections.Hashable, cdd.NumberTypeable):
         :raises: :exc:`~exceptions.TypeError` if other is not a scalar
         """
         other = self.make_number(other)
-        return Gamble(self.pspace,
-                      [oper(value, other) for value in self.itervalues()],
-                      number_type=self.number_type)
+        if self._is_array_type():
+            if oper is operator.truediv and other == 0:
+                # numpy would return infinity instead
+                raise ZeroDivisionError("float division by zero")
+            return self._from_values(oper(self._values, other))
+        if self._is_scaled_type():
+            return self._from_values(oper(self._values, other))
+        return self._from_values(
+            tuple(oper(value, other) for value in self._values))
 
     def _pointwise(self, other, oper):
         """
         :raises: :exc:`~exceptions.ValueError` if possibility spaces do not match
         """
         if isinstance(other, Gamble):
-            if self.pspace != other.pspace:
-                raise ValueError("possibility space mismatch")
+            if not self._pspace._has_same_order(other._pspace):
+                if self.pspace != other.pspace:
+                    raise ValueError("possibility space mismatch")
+                # same elements, different order
+                other = Gamble(self.pspace, other,
+                               number_type=other.number_type)
             if self.number_type != other.number_type:
                 raise ValueError("number type mismatch")
-            return Gamble(
-                self.pspace,
-                [oper(value, other_value)
-                 for value, other_value
-                 in itertools.izip(self.itervalues(), other.itervalues())],
-                number_type=self.number_type)
+            if self._is_array_type() or self._is_scaled_type():
+                return self._from_values(oper(self._values, other._values))
+            return self._from_values(
+                tuple(oper(value, other_value)
+                      for value, other_value
+                      in itertools.izip(self._values, other._values)))
         elif isinstance(other, Event):
             return self._pointwise(
                 other.indicator(number_type=self.number_type), oper)
@@ -632,14 +1199,15 @@ class Gamble(collections.Mapping, collections.Hashable, cdd.NumberTypeable):
             # will raise a type error if operand is not scalar
             return self._scalar(other, oper)
 
-    __add__ = lambda self, other: self._pointwise(other, self.NumberType.__add__)
-    __sub__ = lambda self, other: self._pointwise(other, self.NumberType.__sub__)
-    __mul__ = lambda self, other: self._pointwise(other, self.NumberType.__mul__)
-    __truediv__ = lambda self, other: self._scalar(other, self.NumberType.__truediv__)
+    __add__ = lambda self, other: self._pointwise(other, operator.add)
+    __sub__ = lambda self, other: self._pointwise(other, operator.sub)
+    __mul__ = lambda self, other: self._pointwise(other, operator.mul)
+    __truediv__ = lambda self, other: self._scalar(other, operator.truediv)
 
     def __neg__(self):
-        return Gamble(self.pspace, [-value for value in self.itervalues()],
-                      number_type=self.number_type)
+        if self._is_array_type() or self._is_scaled_type():
+            return self._from_values(-self._values)
+        return self._from_values(tuple(-value for value in self._values))
 
     __radd__ = __add__
     __rsub__ = lambda self, other: self.__sub__(other).__neg__()
@@ -647,11 +1215,19 @@ class Gamble(collections.Mapping, collections.Hashable, cdd.NumberTypeable):
 
     def minimum(self):
         """Find minimum value of the gamble."""
-        return min(value for value in self.itervalues())
+        if self._is_array_type():
+            return float(self._values.min())
+        if self._is_scaled_type():
+            return self._values.minimum()
+        return min(self._values)
 
     def maximum(self):
         """Find maximum value of the gamble."""
-        return max(value for value in self.itervalues())
+        if self._is_array_type():
+            return float(self._values.max())
+        if self._is_scaled_type():
+            return self._values.maximum()
+        return max(self._values)
 
 class Event(collections.Set, collections.Hashable):
     """An immutable event.
@@ -702,34 +1278,79 @@ class Event(collections.Set, collections.Hashable):
         :param name: The name of the event (used for pretty printing).
         :type name: :class:`str`
         """
-        def validated(omega):
-            if omega in pspace:
-                return omega
-            else:
-                raise ValueError(
-                    "event has element ({0}) not in possibility space"
-                    .format(omega))
         self._pspace = PSpace.make(pspace)
-        if isinstance(data, collections.Iterable):
-            self._data = frozenset(validated(omega) for omega in data)
+        if (isinstance(data, Event)
+            and data._pspace._has_same_order(self._pspace)):
+            self._mask = data._mask
+        elif isinstance(data, collections.Iterable):
+            positions = self._pspace._positions
+            mask = 0
+            for omega in data:
+                try:
+                    mask |= 1 << positions[omega]
+                except KeyError:
+                    raise ValueError(
+                        "event has element ({0}) not in possibility space"
+                        .format(omega))
+            self._mask = mask
         elif data is True:
-            self._data = frozenset(self.pspace)
+            self._mask = (1 << len(self._pspace)) - 1
         elif data is False:
-            self._data = frozenset()
+            self._mask = 0
         else:
             raise TypeError("specify data as iterable, True, or False")
-        if name is not None:
-            self._name = name
-        else:
-            self._name = "(" + ",".join(str(omega) for omega in self) + ")"
+        self._name = name
+
+    @classmethod
+    def from_mask(cls, pspace, mask, name=None):
+        """Construct an event directly from its bit mask, without any
+        validation.
+
+        :param pspace: The possibility space.
+        :type pspace: :class:`PSpace`
+        :param mask: The mask; bit *i* is set if and only if the *i*-th
+            element of *pspace* belongs to the event.
+        :type mask: :class:`int`
+        :param name: The name of the event (used for pretty printing).
+        :type name: :class:`str`
+        :return: The event.
+        :rtype: :class:`Event`
+
+        >>> pspace = PSpace('abcd')
+        >>> print(Event.from_mask(pspace, 0b1010))
+        a : 0
+        b : 1
+        c : 0
+        d : 1
+        >>> Event.from_mask(pspace, 0b1010) == Event(pspace, 'bd')
+        True
+        """
+        event = cls.__new__(cls)
+        event._pspace = pspace
+        event._mask = mask
+        event._name = name
+        return event
 
     @property
     def pspace(self):
         """An :class:`~improb.PSpace` representing the possibility space."""
         return self._pspace
 
+    @property
+    def mask(self):
+        """The event as an integer bit mask: bit *i* is set if and only
+        if the *i*-th element of the possibility space belongs to the
+        event.
+
+        >>> Event(PSpace('abcd'), 'acd').mask
+        13
+        """
+        return self._mask
+
     @property
     def name(self):
+        if self._name is None:
+            self._name = "(" + ",".join(str(omega) for omega in self) + ")"
         return self._name
 
     # must override this because the class constructor does not accept
@@ -737,17 +1358,84 @@ class Event(collections.Set, collections.Hashable):
     def _from_iterable(self, it):
         return Event(self._pspace, it)
 
+    def _is_compatible(self, other):
+        """Can the masks of *self* and *other* be combined directly?"""
+        return (isinstance(other, Event)
+                and (self._pspace is other._pspace
+                     or self._pspace._has_same_order(other._pspace)))
+
     def __len__(self):
-        return len(self._data)
+        return bin(self._mask).count('1')
 
     def __iter__(self):
-        return (omega for omega in self._pspace if omega in self._data)
+        mask = self._mask
+        pspace = self._pspace
+        # avoid constructing all elements of a product space
+        data = pspace if pspace._tuple is None else pspace._tuple
+        while mask:
+            lowest = mask & -mask
+            yield data[lowest.bit_length() - 1]
+            mask ^= lowest
 
     def __contains__(self, omega):
-        return omega in self._data
+        try:
+            index = self._pspace._positions[omega]
+        except KeyError:
+            return False
+        return bool((self._mask >> index) & 1)
 
     def __hash__(self):
-        return hash((self._pspace, self._data))
+        return hash(self._mask)
+
+    def __eq__(self, other):
+        if self._is_compatible(other):
+            return self._mask == other._mask
+        return collections.Set.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __le__(self, other):
+        if self._is_compatible(other):
+            return not (self._mask & ~other._mask)
+        return collections.Set.__le__(self, other)
+
+    def __lt__(self, other):
+        if self._is_compatible(other):
+            return (self._mask != other._mask
+                    and not (self._mask & ~other._mask))
+        return collections.Set.__lt__(self, other)
+
+    def __ge__(self, other):
+        if self._is_compatible(other):
+            return not (other._mask & ~self._mask)
+        return collections.Set.__ge__(self, other)
+
+    def __gt__(self, other):
+        if self._is_compatible(other):
+            return (self._mask != other._mask
+                    and not (other._mask & ~self._mask))
+        return collections.Set.__gt__(self, other)
+
+    def __and__(self, other):
+        if self._is_compatible(other):
+            return Event.from_mask(self._pspace, self._mask & other._mask)
+        return collections.Set.__and__(self, other)
+
+    def __or__(self, other):
+        if self._is_compatible(other):
+            return Event.from_mask(self._pspace, self._mask | other._mask)
+        return collections.Set.__or__(self, other)
+
+    def __xor__(self, other):
+        if self._is_compatible(other):
+            return Event.from_mask(self._pspace, self._mask ^ other._mask)
+        return collections.Set.__xor__(self, other)
+
+    def isdisjoint(self, other):
+        if self._is_compatible(other):
+            return not (self._mask & other._mask)
+        return collections.Set.isdisjoint(self, other)
 
     def __repr__(self):
         """
@@ -765,9 +1453,10 @@ class Event(collections.Set, collections.Hashable):
         sun    : 0
         clouds : 1
         """
+        mask = self._mask
         return _str_keys_values(
             self.pspace,
-            (1 if omega in self else 0 for omega in self.pspace))
+            ((mask >> index) & 1 for index in xrange(len(self.pspace))))
 
     def complement(self):
         """Calculate the complement of the event.
@@ -782,7 +1471,8 @@ class Event(collections.Set, collections.Hashable):
         :return: Complement.
         :rtype: :class:`Event`
         """
-        return Event(self.pspace, True) - self
+        return Event.from_mask(
+            self._pspace, ((1 << len(self._pspace)) - 1) & ~self._mask)
 
     def indicator(self, number_type=None):
         """Return indicator gamble for the event.
@@ -813,23 +1503,26 @@ class Event(collections.Set, collections.Hashable):
         if number_type is None:
             # float is default
             number_type = 'float'
+        mask = self._mask
         return Gamble(self.pspace,
-                      dict((omega, 1 if omega in self else 0)
-                           for omega in self.pspace),
+                      [(mask >> index) & 1
+                       for index in xrange(len(self.pspace))],
                       number_type=number_type)
 
     def is_true(self):
-        return len(self) == len(self.pspace)
+        return self._mask == (1 << len(self._pspace)) - 1
 
     def is_false(self):
-        return len(self) == 0
+        return self._mask == 0
 
     def is_singleton(self):
-        return len(self) == 1
+        return self._mask != 0 and not (self._mask & (self._mask - 1))
 
     def __sub__(self, other):
         # override this to make sure we only do set difference!
-        if isinstance(other, collections.Set):
+        if self._is_compatible(other):
+            return Event.from_mask(self._pspace, self._mask & ~other._mask)
+        elif isinstance(other, collections.Set):
             return collections.Set.__sub__(self, other)
         else:
             # e.g. a Gamble: will be handled by Gamble.__rsub__
@@ -20,9 +20,21 @@ from __future__ import division, absolute_import, print_function
 
 from abc import ABCMeta, abstractproperty, abstractmethod
 import cdd
+import itertools
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 from improb import PSpace, Gamble, Event
+import improb.linprog
 from improb.lowprev import LowPrev
+from improb.lowprev.lowpoly import LowPoly
+
+# cdd.NumberTypeable.number_cmp considers floats equal up to this
+# (absolute) tolerance
+_FLOAT_TOLERANCE = 1e-6
 
 class Opt:
     """Abstract base class for optimality operators."""
@@ -147,15 +159,220 @@ class OptAdmissible(OptPartialPreorder, cdd.NumberTypeable):
                 any(diff > 0 for diff in diffs))
 
 class OptLowPrevMax(OptPartialPreorder):
-    """Maximality with respect to a lower prevision."""
-    def __init__(self, lowprev):
+    """Maximality with respect to a lower prevision.
+
+    The following algorithms are supported:
+
+    * ``'linprog'`` (the default, also used if :const:`None`): chain
+      cheap filters before solving linear programs, see
+      :meth:`__call__`.
+
+    * ``'vertices'``: evaluate all gambles at the extreme points of
+      the credal set, and derive dominance from these expectations,
+      see :meth:`get_dominance_matrix`. This solves no linear
+      programs once the extreme points are known, and is only
+      supported for :class:`~improb.lowprev.lowpoly.LowPoly`.
+
+    * ``'auto'``: use ``'vertices'`` for a
+      :class:`~improb.lowprev.lowpoly.LowPoly` whose credal set has
+      few constraints (see :attr:`max_vertices_constraints_factor`),
+      and ``'linprog'`` otherwise.
+    """
+
+    #: The ``'auto'`` algorithm uses the extreme points of the credal
+    #: set if it has at most this many constraints per element of the
+    #: possibility space, besides those stating that probabilities are
+    #: non-negative and sum to one.
+    max_vertices_constraints_factor = 2
+
+    def __init__(self, lowprev, algorithm=None):
         if not isinstance(lowprev, LowPrev):
             raise TypeError("expected a lower prevision as first argument")
+        if algorithm not in (None, 'linprog', 'vertices', 'auto'):
+            raise ValueError("invalid algorithm '{0}'".format(algorithm))
+        if algorithm == 'vertices' and not isinstance(lowprev, LowPoly):
+            raise TypeError(
+                "algorithm 'vertices' requires a polyhedral lower prevision")
         self._lowprev = lowprev
+        self.algorithm = algorithm
 
     def is_strictly_larger(self, gamble, other_gamble, event=True):
         return self._lowprev.dominates(gamble, other_gamble, event=event)
 
+    def __call__(self, gambles, event=True):
+        """Yields maximal gambles from the given set of gambles, in
+        the order in which they are given. Filters are chained from
+        cheapest to most expensive, and each only removes gambles
+        which are dominated:
+
+        1. gambles which are pointwise strictly dominated on *event*
+           (no linear programs),
+
+        2. gambles whose upper prevision is dominated by the lower
+           prevision of another gamble (one batch of lower and upper
+           previsions),
+
+        3. gambles which are dominated by another remaining gamble;
+           only gambles with at least as high lower and upper
+           prevision can dominate, and these are checked with a
+           single call to
+           :meth:`~improb.lowprev.LowPrev.get_lower_many` for each
+           candidate.
+
+        Because dominance is transitive, it suffices to compare
+        against the remaining gambles at each stage. The result is
+        the same as with pairwise comparison by
+        :meth:`is_strictly_larger`.
+
+        >>> from improb.lowprev.lowpoly import LowPoly
+        >>> lpr = LowPoly(pspace='abc', lprob={'a': '0.1', 'b': '0.2', 'c': '0.3'})
+        >>> opt = OptLowPrevMax(lpr)
+        >>> gambles = [[1, 1, 1], [2, 0, 0], [0, 2, 0], [0, 0, 2],
+        ...            [1, 1, 0], ['0.9', '0.9', '0.9'], [-1, 4, -1]]
+        >>> list(opt(gambles))
+        [[1, 1, 1], [2, 0, 0], [0, 2, 0], [0, 0, 2], [-1, 4, -1]]
+        >>> list(opt(gambles)) == list(OptPartialPreorder.__call__(opt, gambles))
+        True
+        >>> list(opt(gambles, event='ab'))
+        [[1, 1, 1], [2, 0, 0], [0, 2, 0], [1, 1, 0], [-1, 4, -1]]
+        >>> (list(opt(gambles, event='ab'))
+        ...  == list(OptPartialPreorder.__call__(opt, gambles, event='ab')))
+        True
+        >>> opt_vertices = OptLowPrevMax(lpr, algorithm='vertices')
+        >>> list(opt_vertices(gambles)) == list(opt(gambles))
+        True
+        >>> (list(opt_vertices(gambles, event='ab'))
+        ...  == list(opt(gambles, event='ab')))
+        True
+        >>> lpr.set_lower([0, 1, 0], '0.8')
+        >>> list(opt_vertices(gambles)) # doctest: +ELLIPSIS
+        Traceback (most recent call last):
+            ...
+        ValueError: lower prevision incurs sure loss:
+        ...
+        """
+        lowprev = self._lowprev
+        event = lowprev.pspace.make_event(event)
+        gambles = list(gambles)
+        algorithm = _get_algorithm(
+            lowprev, self.algorithm, event,
+            self.max_vertices_constraints_factor)
+        if algorithm == 'vertices':
+            if not gambles:
+                return
+            expectations = _get_expectations(lowprev, gambles, event)
+            # interval dominance, then pairwise on the remaining gambles
+            lowers, uppers = _get_bounds(expectations)
+            max_lower = max(lowers)
+            indices = [
+                i for i, upper in enumerate(uppers)
+                if lowprev.number_cmp(max_lower, upper) <= 0]
+            if isinstance(expectations, list):
+                expectations = [expectations[i] for i in indices]
+                dominated = [
+                    any(row) for row in self._get_dominated(expectations)]
+            else:
+                expectations = expectations[indices]
+                dominated = (
+                    self._get_dominated(expectations).any(axis=1).tolist())
+            for i, is_dominated in itertools.izip(indices, dominated):
+                if not is_dominated:
+                    yield gambles[i]
+            return
+        candidates = [lowprev.make_gamble(gamble) for gamble in gambles]
+        indices, lowers, uppers = _get_undominated(lowprev, candidates, event)
+        for j, i in enumerate(indices):
+            others = [
+                candidates[k]
+                for k, lower, upper in itertools.izip(indices, lowers, uppers)
+                if k != i
+                and lowprev.number_cmp(lower, lowers[j]) >= 0
+                and lowprev.number_cmp(upper, uppers[j]) >= 0]
+            if others and any(
+                lowprev.number_cmp(value) == 1
+                for value in lowprev.get_lower_many(
+                    [other - candidates[i] for other in others], event)):
+                continue
+            yield gambles[i]
+
+    def get_dominance_matrix(self, gambles, event=True):
+        """Calculate the strict dominance relation between all
+        gambles at once: *gamble* dominates *other_gamble* if the
+        minimum of its expected gain over the extreme points of the
+        credal set is strictly positive. The expectations of all
+        gambles at all extreme points are calculated once, as a single
+        matrix product for the float number type (if numpy is
+        installed), and the minimal differences are derived from
+        them.
+
+        :param gambles: The gambles.
+        :type gambles: :class:`list` of |gambletype|
+        :param event: The event to condition on.
+        :type event: |eventtype|
+        :return: For each gamble, for each gamble, whether the first
+            dominates the second.
+        :rtype: :class:`list` of :class:`list` of :class:`bool`
+
+        >>> from improb.lowprev.lowpoly import LowPoly
+        >>> lpr = LowPoly(pspace='abc', lprob={'a': '0.1', 'b': '0.2', 'c': '0.3'})
+        >>> opt = OptLowPrevMax(lpr, algorithm='vertices')
+        >>> gambles = [[1, 1, 1], [2, 0, 0], ['0.9', '0.9', '0.9']]
+        >>> for row in opt.get_dominance_matrix(gambles):
+        ...     print(row)
+        [False, False, True]
+        [False, False, False]
+        [False, False, False]
+        >>> gambles = [[1, 2, 3], [3, 2, 1], [2, 0, 4]]
+        >>> dominance = opt.get_dominance_matrix(gambles)
+        >>> dominance == [[opt.is_strictly_larger(gamble, other_gamble)
+        ...                for other_gamble in gambles]
+        ...               for gamble in gambles]
+        True
+        """
+        gambles = list(gambles)
+        if not gambles:
+            return []
+        event = self._lowprev.pspace.make_event(event)
+        dominated = self._get_dominated(
+            _get_expectations(self._lowprev, gambles, event))
+        if isinstance(dominated, list):
+            return [list(row) for row in zip(*dominated)]
+        return dominated.T.tolist()
+
+    def _get_dominated(self, expectations):
+        """Helper function to calculate, for each gamble, which gambles
+        dominate it, from the *expectations* as returned by
+        :func:`_get_expectations`: a gamble dominates another if its
+        minimal expected gain over it is strictly positive.
+
+        :return: For each gamble, for each gamble, whether the second
+            dominates the first, as a boolean :class:`numpy.ndarray` if
+            *expectations* is one, or as a :class:`list` of
+            :class:`list`\ s otherwise.
+        """
+        if isinstance(expectations, list):
+            number_cmp = self._lowprev.number_cmp
+            return [
+                [number_cmp(min(other_value - value
+                                for other_value, value
+                                in itertools.izip(other_expectation,
+                                                  expectation))) == 1
+                 for other_expectation in expectations]
+                for expectation in expectations]
+        num_gambles = len(expectations)
+        dominated = numpy.zeros((num_gambles, num_gambles), dtype=bool)
+        if not num_gambles:
+            return dominated
+        # limit the size of the intermediate three dimensional array
+        size = max(1, 2 ** 22 // expectations.size)
+        for start in xrange(0, num_gambles, size):
+            differences = (
+                expectations[numpy.newaxis, :, :]
+                - expectations[start:start + size, numpy.newaxis, :])
+            dominated[start:start + size] = (
+                differences.min(axis=2) > _FLOAT_TOLERANCE)
+        return dominated
+
 class OptLowPrevMaxMin(OptTotalPreorder):
     """Gamma-maximin with respect to a lower prevision."""
     def __init__(self, lowprev):
@@ -186,8 +403,354 @@ class OptLowPrevMaxHurwicz(OptLowPrevMaxMin):
 class OptLowPrevMaxInterval(OptLowPrevMax):
     """Interval dominance with respect to a lower prevision."""
 
-    # TODO implement faster algorithm
     def is_strictly_larger(self, gamble, other_gamble, event=True):
         return self._lowprev.number_cmp(
             self._lowprev.get_lower(gamble, event=event),
             self._lowprev.get_upper(other_gamble, event=event)) > 0
+
+    def __call__(self, gambles, event=True):
+        """Yields optimal gambles from the given set of gambles: those
+        whose upper prevision is not dominated by the highest lower
+        prevision, which are found from one batch of lower and upper
+        previsions. Gambles whose upper prevision equals the highest
+        lower prevision are kept.
+
+        >>> from improb.lowprev.lowpoly import LowPoly
+        >>> lpr = LowPoly(pspace='abc', number_type='fraction')
+        >>> lpr.set_lower([1, 0, 0], '1/4')
+        >>> lpr.set_upper([1, 0, 0], '1/2')
+        >>> opt = OptLowPrevMaxInterval(lpr)
+        >>> gambles = [[4, 0, 0], [0, 2, 2], [1, 1, 1], [0, 0, '2/3']]
+        >>> list(opt(gambles))
+        [[4, 0, 0], [0, 2, 2], [1, 1, 1]]
+        >>> list(opt(gambles)) == list(OptPartialPreorder.__call__(opt, gambles))
+        True
+        >>> list(opt(gambles, event='bc'))
+        [[0, 2, 2]]
+        >>> (list(opt(gambles, event='bc'))
+        ...  == list(OptPartialPreorder.__call__(opt, gambles, event='bc')))
+        True
+        >>> opt_vertices = OptLowPrevMaxInterval(lpr, algorithm='vertices')
+        >>> list(opt_vertices(gambles)) == list(opt(gambles))
+        True
+        """
+        lowprev = self._lowprev
+        event = lowprev.pspace.make_event(event)
+        gambles = list(gambles)
+        if not gambles:
+            return
+        algorithm = _get_algorithm(
+            lowprev, self.algorithm, event,
+            self.max_vertices_constraints_factor)
+        if algorithm == 'vertices':
+            lowers, uppers = _get_bounds(
+                _get_expectations(lowprev, gambles, event))
+        else:
+            lowers = lowprev.get_lower_many(gambles, event)
+            uppers = lowprev.get_upper_many(gambles, event)
+        max_lower = max(lowers)
+        for gamble, upper in zip(gambles, uppers):
+            if lowprev.number_cmp(max_lower, upper) <= 0:
+                yield gamble
+
+class OptLowPrevEAdmissible(Opt):
+    """E-admissibility with respect to a polyhedral lower prevision: a
+    gamble is optimal if it has maximal expectation, among all given
+    gambles, for at least one element of the credal set. This is not
+    the optimality operator of a partial preorder. E-admissible
+    gambles are maximal, so gambles which are dominated are removed
+    before solving any linear programs, see :meth:`__call__`.
+
+    The following algorithms are supported:
+
+    * ``'linprog'`` (also used if :const:`None`): solve a linear
+      program for each gamble, see :meth:`__call__`.
+
+    * ``'vertices'``: first accept, without linear programming, all
+      gambles which have maximal expectation at one of the extreme
+      points of the credal set, and solve a linear program only for
+      the other gambles.
+
+    * ``'auto'`` (the default): use ``'vertices'`` if the credal set
+      has few constraints (see
+      :attr:`max_vertices_constraints_factor`), and ``'linprog'``
+      otherwise.
+    """
+
+    #: The ``'auto'`` algorithm uses the extreme points of the credal
+    #: set if it has at most this many constraints per element of the
+    #: possibility space, besides those stating that probabilities are
+    #: non-negative and sum to one.
+    max_vertices_constraints_factor = 2
+
+    def __init__(self, lowprev, algorithm='auto'):
+        if not isinstance(lowprev, LowPoly):
+            raise TypeError(
+                "expected a polyhedral lower prevision as first argument")
+        if algorithm not in (None, 'linprog', 'vertices', 'auto'):
+            raise ValueError("invalid algorithm '{0}'".format(algorithm))
+        self._lowprev = lowprev
+        self.algorithm = algorithm
+
+    def __call__(self, gambles, event=True):
+        """Yields E-admissible gambles from the given set of gambles,
+        in the order in which they are given. First, gambles which are
+        pointwise or interval dominated are removed, as in
+        :meth:`OptLowPrevMax.__call__`; such gambles are not maximal,
+        so they are not E-admissible, and neither do they change which
+        other gambles are. Then, a gamble :math:`f` is E-admissible if
+        the linear program
+
+        .. math::
+
+           \\max_{P,u} P(f)-u\\quad\\text{subject to}\\quad
+           P(g)\\le u\\text{ for all remaining gambles }g
+
+        over the credal set :math:`P` (see
+        :meth:`~improb.lowprev.lowpoly.LowPoly.get_matrix`) has a
+        non-negative optimal value. The constraints are the same for
+        all gambles, so the matrix is constructed only once, and only
+        the objective function changes. An optimal :math:`P` also
+        certifies all other gambles with maximal expectation under
+        it, so their linear programs are skipped.
+
+        >>> from improb.lowprev.lowpoly import LowPoly
+        >>> lpr = LowPoly(pspace='ab', number_type='fraction')
+        >>> gambles = [[1, 0], [0, 1], ['0.4', '0.4']]
+        >>> list(OptLowPrevMax(lpr)(gambles))
+        [[1, 0], [0, 1], ['0.4', '0.4']]
+        >>> list(OptLowPrevEAdmissible(lpr, algorithm='linprog')(gambles))
+        [[1, 0], [0, 1]]
+        >>> list(OptLowPrevEAdmissible(lpr, algorithm='vertices')(gambles))
+        [[1, 0], [0, 1]]
+
+        Gambles which tie for maximal expectation are all E-admissible:
+
+        >>> gambles = [[1, 0], [0, 1], ['1/2', '1/2']]
+        >>> list(OptLowPrevEAdmissible(lpr, algorithm='linprog')(gambles))
+        [[1, 0], [0, 1], ['1/2', '1/2']]
+        >>> list(OptLowPrevEAdmissible(lpr, algorithm='vertices')(gambles))
+        [[1, 0], [0, 1], ['1/2', '1/2']]
+
+        Conditional on an event, only the values on that event matter:
+
+        >>> lpr = LowPoly(pspace='abc', number_type='fraction')
+        >>> lpr.set_lower([1, 0, 0], '1/4')
+        >>> lpr.set_upper([1, 0, 0], '1/2')
+        >>> gambles = [[3, 0, 0], [0, 2, 0], [0, 0, 1]]
+        >>> opt = OptLowPrevEAdmissible(lpr)
+        >>> list(opt(gambles))
+        [[3, 0, 0], [0, 2, 0], [0, 0, 1]]
+        >>> list(opt(gambles, event='ab'))
+        [[3, 0, 0], [0, 2, 0]]
+        >>> (list(OptLowPrevEAdmissible(lpr, algorithm='linprog')(
+        ...     gambles, event='ab')) == list(opt(gambles, event='ab')))
+        True
+        """
+        lowprev = self._lowprev
+        event = lowprev.pspace.make_event(event)
+        gambles = list(gambles)
+        candidates = [lowprev.make_gamble(gamble) for gamble in gambles]
+        indices = _get_undominated(lowprev, candidates, event)[0]
+        candidates = [candidates[i] for i in indices]
+        matrix = self._get_matrix(candidates, event)
+        algorithm = _get_algorithm(
+            lowprev, self.algorithm, event,
+            self.max_vertices_constraints_factor)
+        if algorithm == 'vertices' and candidates:
+            admissible = self._get_maximizers(
+                _get_expectations(lowprev, candidates, event))
+        else:
+            admissible = set()
+        solver = improb.linprog.make_solver(lowprev.solver, lowprev.number_type)
+        for j, candidate in enumerate(candidates):
+            if j in admissible:
+                continue
+            matrix.obj_func = (
+                [0] + [candidate[omega] if omega in event else 0
+                       for omega in lowprev.pspace] + [-1])
+            linprog = solver.solve(matrix)
+            if linprog.status != cdd.LPStatusType.OPTIMAL:
+                raise RuntimeError(
+                    "BUG: unexpected status (%i)\n"
+                    "gamble:\n%s\n"
+                    "conditioning event:\n%s\n"
+                    "matrix:\n%s\n"
+                    % (linprog.status, candidate, event, matrix))
+            if lowprev.number_cmp(linprog.obj_value) < 0:
+                continue
+            admissible.add(j)
+            # every gamble with maximal expectation under the optimal
+            # probability mass function is also E-admissible (only
+            # its values on the event are constrained)
+            probs = [prob if omega in event else 0
+                     for prob, omega in itertools.izip(
+                         linprog.primal_solution, lowprev.pspace)]
+            admissible |= self._get_maximizers(
+                [[sum(prob * value
+                      for prob, value in itertools.izip(
+                          probs, other.itervalues())
+                      if prob)]
+                 for other in candidates])
+        for j, i in enumerate(indices):
+            if j in admissible:
+                yield gambles[i]
+
+    def _get_matrix(self, gambles, event):
+        """Helper function to construct the constraints of the linear
+        programs in :meth:`__call__`: the constraints of the credal
+        set conditional on *event*, with one extra variable, which
+        bounds the expectation of each gamble from above.
+
+        :return: The matrix.
+        :rtype: :class:`cdd.Matrix`
+        """
+        lowprev = self._lowprev
+        credal_matrix = lowprev.get_matrix(None, event)
+        col_size = credal_matrix.col_size + 1
+        rows = [
+            dict((col, value)
+                 for col, value in enumerate(credal_matrix[i]) if value)
+            for i in xrange(credal_matrix.row_size)]
+        index = lowprev.pspace.index
+        for gamble in gambles:
+            row = dict((1 + index(omega), -gamble[omega])
+                       for omega in event if gamble[omega])
+            row[col_size - 1] = 1
+            rows.append(row)
+        matrix = improb.linprog.make_matrix(
+            rows, col_size, credal_matrix.lin_set, lowprev.number_type)
+        matrix.obj_type = cdd.LPObjType.MAX
+        return matrix
+
+    def _get_maximizers(self, expectations):
+        """Helper function to find the gambles with maximal
+        expectation for at least one of the probability mass
+        functions, given the *expectations* of each gamble (rows)
+        under each probability mass function (columns), as returned by
+        :func:`_get_expectations`.
+
+        :return: The indices of these gambles.
+        :rtype: :class:`set` of :class:`int`
+        """
+        if isinstance(expectations, list):
+            maxima = [max(column) for column in zip(*expectations)]
+            gaps = [max(value - maximum
+                        for value, maximum in itertools.izip(
+                            expectation, maxima))
+                    for expectation in expectations]
+        else:
+            gaps = (expectations - expectations.max(axis=0)).max(axis=1)
+            gaps = gaps.tolist()
+        return set(j for j, gap in enumerate(gaps)
+                   if self._lowprev.number_cmp(gap) >= 0)
+
+def _get_algorithm(lowprev, algorithm, event, max_constraints_factor):
+    """Helper function to resolve the *algorithm* of an optimality
+    operator into ``'linprog'`` or ``'vertices'``. The ``'auto'``
+    algorithm selects ``'vertices'`` for a polyhedral lower prevision
+    whose credal set conditional on *event* has at most
+    *max_constraints_factor* constraints per element of the
+    possibility space, besides those stating that probabilities are
+    non-negative and sum to one.
+    """
+    if algorithm is None:
+        return 'linprog'
+    if algorithm != 'auto':
+        return algorithm
+    if not isinstance(lowprev, LowPoly):
+        return 'linprog'
+    num_constraints = (
+        lowprev.get_matrix(None, event).row_size - len(lowprev.pspace) - 1)
+    if num_constraints <= max_constraints_factor * len(lowprev.pspace):
+        return 'vertices'
+    return 'linprog'
+
+def _get_expectations(lowprev, gambles, event):
+    """Helper function to calculate the expectation of every gamble at
+    every extreme point of the credal set of *lowprev* conditional on
+    *event*.
+
+    :return: One row for each gamble, as a :class:`numpy.ndarray` for
+        the float number type if numpy is installed, or as a
+        :class:`list` of :class:`list`\\ s otherwise.
+    """
+    # the credal set is empty if the lower prevision incurs sure loss
+    if not lowprev.is_avoiding_sure_loss():
+        raise ValueError(
+            "lower prevision incurs sure loss:\n{0}".format(lowprev))
+    vertices = list(lowprev.get_credal_set(event))
+    gambles = [lowprev.make_gamble(gamble) for gamble in gambles]
+    if numpy is not None and lowprev.number_type == 'float':
+        # extreme points are zero outside event, so no need to
+        # restrict the gambles
+        return numpy.dot(
+            numpy.array([gamble.as_array() for gamble in gambles]),
+            numpy.array(vertices, dtype=float).T)
+    return [
+        [sum(prob * value
+             for prob, value in itertools.izip(vertex, gamble.itervalues())
+             if prob)
+         for vertex in vertices]
+        for gamble in gambles]
+
+def _get_bounds(expectations):
+    """Helper function to calculate the lower and upper prevision of
+    every gamble from the *expectations* as returned by
+    :func:`_get_expectations`.
+
+    :return: The lower and the upper previsions.
+    :rtype: :class:`tuple` of two :class:`list`\\ s
+    """
+    if isinstance(expectations, list):
+        return ([min(expectation) for expectation in expectations],
+                [max(expectation) for expectation in expectations])
+    return (expectations.min(axis=1).tolist(),
+            expectations.max(axis=1).tolist())
+
+def _get_undominated(lowprev, gambles, event):
+    """Helper function to remove gambles which are pointwise
+    dominated (see :func:`_get_pointwise_undominated`), and then
+    gambles whose upper prevision is dominated by the lower prevision
+    of another gamble.
+
+    :return: The indices of the remaining gambles, in order, and their
+        lower and upper previsions.
+    :rtype: :class:`tuple` of three :class:`list`\\ s
+    """
+    indices = _get_pointwise_undominated(lowprev, gambles, event)
+    if not indices:
+        return [], [], []
+    lowers = lowprev.get_lower_many([gambles[i] for i in indices], event)
+    uppers = lowprev.get_upper_many([gambles[i] for i in indices], event)
+    max_lower = max(lowers)
+    remaining = [
+        j for j, upper in enumerate(uppers)
+        if lowprev.number_cmp(max_lower, upper) <= 0]
+    return ([indices[j] for j in remaining],
+            [lowers[j] for j in remaining],
+            [uppers[j] for j in remaining])
+
+def _get_pointwise_undominated(lowprev, gambles, event):
+    """Helper function to remove gambles which are strictly dominated
+    by another gamble everywhere on *event*. Such gambles are also
+    dominated in lower prevision.
+
+    :return: The indices of the remaining gambles, in order.
+    :rtype: :class:`list` of :class:`int`
+    """
+    number_cmp = lowprev.number_cmp
+    values = [[gamble[omega] for omega in event] for gamble in gambles]
+    # a dominating gamble has a higher sum, so visiting gambles in
+    # order of decreasing sum, any dominating gamble is visited first,
+    # and then by transitivity also one that is kept
+    order = sorted(
+        xrange(len(gambles)), key=lambda i: sum(values[i]), reverse=True)
+    kept = []
+    for i in order:
+        if not any(
+            all(number_cmp(value, other_value) < 0
+                for value, other_value in zip(values[i], values[k]))
+            for k in kept):
+            kept.append(i)
+    return sorted(kept)
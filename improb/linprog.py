@@ -0,0 +1,463 @@
+# improb is a Python module for working with imprecise probabilities
+# Copyright (c) 2008-2011, Matthias Troffaes
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+r"""Linear programming solvers.
+
+All linear programs are specified as a :class:`cdd.Matrix` in
+inequality representation: every row :math:`(b, a)` is a constraint
+:math:`b + a\cdot x\ge 0`, or :math:`b + a\cdot x=0` if the row is in
+:attr:`~cdd.Matrix.lin_set`. The objective function
+:attr:`~cdd.Matrix.obj_func` is minimized or maximized according to
+:attr:`~cdd.Matrix.obj_type`.
+
+The following solvers are available:
+
+* ``'cdd'``: the simplex method of :class:`cdd.LinProg`; this is the
+  default, and supports both float and exact arithmetic.
+
+* ``'numpy'``: a dense simplex method implemented with numpy; only
+  for float arithmetic.
+
+* ``'scipy'``: :func:`scipy.optimize.linprog`; only for float
+  arithmetic.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+from abc import ABCMeta, abstractmethod
+import cdd
+import collections
+try:
+    import numpy
+except ImportError:
+    numpy = None
+try:
+    import scipy.optimize
+except ImportError:
+    scipy = None
+
+LinProgResult = collections.namedtuple(
+    'LinProgResult', 'status obj_value primal_solution')
+"""Result of a linear program: the status (one of the constants of
+:class:`cdd.LPStatusType`), the optimal value, and the optimal
+solution.
+"""
+
+class LinProgSolver(cdd.NumberTypeable):
+    """Abstract base class for linear programming solvers."""
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def solve(self, matrix):
+        """Solve the linear program.
+
+        :param matrix: The linear program.
+        :type matrix: :class:`cdd.Matrix`
+        :return: The result.
+        :rtype: :class:`LinProgResult`
+        """
+        raise NotImplementedError
+
+class LinProgSolverCdd(LinProgSolver):
+    """Solve linear programs with :class:`cdd.LinProg`.
+
+    >>> matrix = cdd.Matrix([[1, -1, 0], [1, 0, -1], [0, 1, 0], [0, 0, 1],
+    ...                      [3, -2, -2]], number_type='fraction')
+    >>> matrix.obj_type = cdd.LPObjType.MAX
+    >>> matrix.obj_func = (0, 1, 2)
+    >>> result = LinProgSolverCdd('fraction').solve(matrix)
+    >>> result.status == cdd.LPStatusType.OPTIMAL
+    True
+    >>> print(result.obj_value)
+    5/2
+    >>> print(" ".join(str(x) for x in result.primal_solution))
+    1/2 1
+    """
+
+    def solve(self, matrix):
+        linprog = cdd.LinProg(matrix)
+        linprog.solve()
+        return LinProgResult(
+            linprog.status, linprog.obj_value, linprog.primal_solution)
+
+class LinProgSolverNumpy(LinProgSolver):
+    """Solve linear programs with a dense two phase simplex method,
+    implemented in numpy. The simplex method is applied to the dual
+    linear program, which has one row for every variable, rather than
+    one row for every constraint, so it is well suited for problems
+    with many more constraints than variables, such as those arising
+    in natural extension. Rows which only state that a single
+    variable is non-negative are taken into account as sign
+    constraints on the variable. Dantzig's rule is used for pivoting,
+    switching to Bland's rule after degenerate pivots to avoid
+    cycling.
+
+    >>> matrix = cdd.Matrix([[1, -1, 0], [1, 0, -1], [0, 1, 0], [0, 0, 1],
+    ...                      [3, -2, -2]], number_type='float')
+    >>> matrix.obj_type = cdd.LPObjType.MAX
+    >>> matrix.obj_func = (0, 1, 2)
+    >>> result = LinProgSolverNumpy('float').solve(matrix)
+    >>> result.status == cdd.LPStatusType.OPTIMAL
+    True
+    >>> print(round(result.obj_value, 9))
+    2.5
+    >>> print([round(x, 9) for x in result.primal_solution])
+    [0.5, 1.0]
+    >>> matrix.obj_func = (0, -1, -2)
+    >>> print(round(LinProgSolverNumpy('float').solve(matrix).obj_value, 9))
+    0.0
+    >>> matrix = cdd.Matrix([[0, 1, 0], [0, 0, 1]], number_type='float')
+    >>> matrix.obj_type = cdd.LPObjType.MAX
+    >>> matrix.obj_func = (0, 1, 2)
+    >>> result = LinProgSolverNumpy('float').solve(matrix)
+    >>> result.status == cdd.LPStatusType.DUAL_INCONSISTENT
+    True
+    >>> matrix = cdd.Matrix([[-1, 1], [0, -1]], number_type='float')
+    >>> matrix.obj_type = cdd.LPObjType.MAX
+    >>> matrix.obj_func = (0, 1)
+    >>> result = LinProgSolverNumpy('float').solve(matrix)
+    >>> result.status == cdd.LPStatusType.INCONSISTENT
+    True
+    """
+
+    #: Tolerance for zero tests in the tableau.
+    tolerance = 1e-9
+
+    def __init__(self, number_type='float'):
+        if numpy is None:
+            raise ImportError("numpy solver requires numpy")
+        if number_type != 'float':
+            raise ValueError("numpy solver requires float number type")
+        LinProgSolver.__init__(self, number_type)
+
+    def solve(self, matrix):
+        # the primal problem, as minimization, is
+        #   min c x  s.t.  a_i x >= -b_i (i in I),  a_i x = -b_i (i in E),
+        #                  x_j >= 0 (j in N),  x_j free otherwise
+        # and its dual, as minimization, is
+        #   min b y  s.t.  a_j y + s_j = c_j (j in N),  a_j y = c_j (j not in N),
+        #                  y_i >= 0 (i in I),  y_i = p_i - q_i (i in E),  s >= 0
+        # where a_j is the j-th column of the constraints
+        rows = numpy.array(
+            [matrix[i] for i in xrange(matrix.row_size)], dtype=float)
+        rows = rows.reshape(matrix.row_size, matrix.col_size)
+        num_vars = matrix.col_size - 1
+        lin_set = matrix.lin_set
+        # find variables which are constrained to be non-negative
+        nonneg = numpy.zeros(num_vars, dtype=bool)
+        keep = numpy.ones(matrix.row_size, dtype=bool)
+        for i, row in enumerate(rows):
+            if i in lin_set or row[0] != 0:
+                continue
+            nonzero = row[1:].nonzero()[0]
+            if len(nonzero) == 1 and row[1 + nonzero[0]] > 0:
+                nonneg[nonzero[0]] = True
+                keep[i] = False
+        is_eq = numpy.array(
+            [i in lin_set for i in xrange(matrix.row_size)],
+            dtype=bool)[keep]
+        rows = rows[keep]
+        sign = -1 if matrix.obj_type == cdd.LPObjType.MAX else 1
+        obj_func = numpy.array(matrix.obj_func, dtype=float)
+        # the dual in standard form: min cost w  s.t.  lhs w = rhs, w >= 0
+        eqs = is_eq.nonzero()[0]
+        nonnegs = nonneg.nonzero()[0]
+        num_cols = len(rows) + len(eqs) + len(nonnegs)
+        lhs = numpy.zeros((num_vars, num_cols))
+        lhs[:, :len(rows)] = rows[:, 1:].T
+        lhs[:, len(rows):len(rows) + len(eqs)] = -rows[eqs, 1:].T
+        lhs[nonnegs, len(rows) + len(eqs) + numpy.arange(len(nonnegs))] = 1
+        rhs = sign * obj_func[1:]
+        cost = numpy.zeros(num_cols)
+        cost[:len(rows)] = rows[:, 0]
+        cost[len(rows):len(rows) + len(eqs)] = -rows[eqs, 0]
+        # make right hand side non-negative
+        flip = numpy.where(rhs < 0, -1.0, 1.0)
+        lhs *= flip[:, numpy.newaxis]
+        rhs *= flip
+        # initial basis: a slack with coefficient +1, or an artificial
+        basis = numpy.empty(num_vars, dtype=int)
+        num_artificials = 0
+        slack_col = dict(
+            (j, len(rows) + len(eqs) + k) for k, j in enumerate(nonnegs))
+        for j in xrange(num_vars):
+            if j in slack_col and flip[j] > 0:
+                basis[j] = slack_col[j]
+            else:
+                basis[j] = num_cols + num_artificials
+                num_artificials += 1
+        initial_basis = basis.copy()
+        # tableau: constraints, then phase 2 and phase 1 objectives
+        tableau = numpy.zeros((num_vars + 2, num_cols + num_artificials + 1))
+        tableau[:num_vars, :num_cols] = lhs
+        tableau[:num_vars, -1] = rhs
+        artificials = (basis >= num_cols).nonzero()[0]
+        tableau[artificials, basis[artificials]] = 1
+        tableau[num_vars, :num_cols] = cost
+        tableau[num_vars + 1, num_cols:num_cols + num_artificials] = 1
+        # express phase 1 objective in terms of the non-basic variables
+        tableau[num_vars + 1] -= tableau[artificials].sum(axis=0)
+        # phase 1
+        if num_artificials:
+            self._simplex(tableau, basis, num_vars + 1,
+                          num_cols + num_artificials)
+            if -tableau[num_vars + 1, -1] > self.tolerance * (
+                1 + numpy.abs(rhs).max()):
+                # dual is infeasible
+                return LinProgResult(
+                    cdd.LPStatusType.DUAL_INCONSISTENT, 0.0,
+                    (0.0,) * num_vars)
+            # drive artificials out of the basis
+            for j in xrange(num_vars):
+                if basis[j] >= num_cols:
+                    candidates = (
+                        numpy.abs(tableau[j, :num_cols])
+                        > self.tolerance).nonzero()[0]
+                    if len(candidates):
+                        self._pivot(tableau, basis, j, candidates[0])
+        # phase 2 (artificials are no longer allowed to enter)
+        if not self._simplex(tableau, basis, num_vars, num_cols):
+            # dual is unbounded, so the primal is infeasible
+            return LinProgResult(
+                cdd.LPStatusType.INCONSISTENT, 0.0, (0.0,) * num_vars)
+        # the primal solution are the simplex multipliers of the
+        # dual, which can be read off the reduced costs of the
+        # initial basis (which has zero cost in phase 2)
+        solution = flip * tableau[num_vars, initial_basis]
+        obj_value = obj_func[0] + numpy.dot(obj_func[1:], solution)
+        return LinProgResult(
+            cdd.LPStatusType.OPTIMAL, float(obj_value),
+            tuple(solution.tolist()))
+
+    def _pivot(self, tableau, basis, row, col):
+        """Pivot the tableau on the given row and column."""
+        tableau[row] /= tableau[row, col]
+        column = tableau[:, col].copy()
+        column[row] = 0
+        tableau -= numpy.outer(column, tableau[row])
+        basis[row] = col
+
+    def _simplex(self, tableau, basis, obj_row, num_cols):
+        """Minimize the objective in row *obj_row*, over the first
+        *num_cols* columns.
+
+        :return: :const:`False` if unbounded, :const:`True` otherwise.
+        :rtype: :class:`bool`
+        """
+        num_rows = len(basis)
+        num_degenerate = 0
+        while True:
+            costs = tableau[obj_row, :num_cols]
+            candidates = (costs < -self.tolerance).nonzero()[0]
+            if not len(candidates):
+                return True
+            if num_degenerate > num_rows:
+                # Bland's rule
+                col = candidates[0]
+            else:
+                # Dantzig's rule
+                col = candidates[costs[candidates].argmin()]
+            column = tableau[:num_rows, col]
+            positive = (column > self.tolerance).nonzero()[0]
+            if not len(positive):
+                return False
+            ratios = tableau[positive, -1] / column[positive]
+            min_ratio = ratios.min()
+            ties = positive[ratios <= min_ratio + self.tolerance]
+            # among ties, leave with the lowest index (Bland)
+            row = ties[basis[ties].argmin()]
+            if min_ratio <= self.tolerance:
+                num_degenerate += 1
+            else:
+                num_degenerate = 0
+            self._pivot(tableau, basis, row, col)
+
+class LinProgSolverScipy(LinProgSolver):
+    """Solve linear programs with :func:`scipy.optimize.linprog`.
+
+    :param method: The method passed to
+        :func:`scipy.optimize.linprog` (if not specified, then
+        scipy's default method is used).
+    :type method: :class:`str`
+
+    The results agree with :class:`LinProgSolverCdd` on an optimal,
+    an unbounded, and an infeasible linear program (this is only
+    checked if scipy is installed):
+
+    >>> def solves_like_cdd(rows, obj_func, method=None):
+    ...     matrix = cdd.Matrix(rows, number_type='float')
+    ...     matrix.obj_type = cdd.LPObjType.MAX
+    ...     matrix.obj_func = obj_func
+    ...     result = LinProgSolverScipy('float', method).solve(matrix)
+    ...     expected = LinProgSolverCdd('float').solve(matrix)
+    ...     return (result.status == expected.status
+    ...             and abs(result.obj_value - expected.obj_value) < 1e-6)
+    >>> examples = [
+    ...     ([[1, -1, 0], [1, 0, -1], [0, 1, 0], [0, 0, 1], [3, -2, -2]],
+    ...      (0, 1, 2)),
+    ...     ([[1, -1, 0], [1, 0, -1], [0, 1, 0], [0, 0, 1], [3, -2, -2]],
+    ...      (0, -1, -2)),
+    ...     ([[0, 1, 0], [0, 0, 1]], (0, 1, 2)),
+    ...     ([[-1, 1], [0, -1]], (0, 1))]
+    >>> scipy is None or all(
+    ...     solves_like_cdd(rows, obj_func, method)
+    ...     for rows, obj_func in examples
+    ...     for method in (None, 'simplex', 'interior-point'))
+    True
+    """
+
+    def __init__(self, number_type='float', method=None):
+        if scipy is None:
+            raise ImportError("scipy solver requires scipy")
+        if number_type != 'float':
+            raise ValueError("scipy solver requires float number type")
+        LinProgSolver.__init__(self, number_type)
+        self.method = method
+
+    def solve(self, matrix):
+        rows = numpy.array(
+            [matrix[i] for i in xrange(matrix.row_size)], dtype=float)
+        rows = rows.reshape(matrix.row_size, matrix.col_size)
+        num_vars = matrix.col_size - 1
+        is_eq = numpy.array(
+            [i in matrix.lin_set for i in xrange(matrix.row_size)],
+            dtype=bool)
+        sign = -1 if matrix.obj_type == cdd.LPObjType.MAX else 1
+        obj_func = numpy.array(matrix.obj_func, dtype=float)
+        kwargs = {}
+        if self.method is not None:
+            kwargs['method'] = self.method
+        if (~is_eq).any():
+            # b + a x >= 0 becomes -a x <= b
+            kwargs['A_ub'] = -rows[~is_eq, 1:]
+            kwargs['b_ub'] = rows[~is_eq, 0]
+        if is_eq.any():
+            kwargs['A_eq'] = rows[is_eq, 1:]
+            kwargs['b_eq'] = -rows[is_eq, 0]
+        result = scipy.optimize.linprog(
+            sign * obj_func[1:], bounds=[(None, None)] * num_vars, **kwargs)
+        if result.status == 0:
+            solution = numpy.asarray(result.x, dtype=float)
+            return LinProgResult(
+                cdd.LPStatusType.OPTIMAL,
+                float(obj_func[0] + numpy.dot(obj_func[1:], solution)),
+                tuple(solution.tolist()))
+        elif result.status == 2:
+            status = cdd.LPStatusType.INCONSISTENT
+        elif result.status == 3:
+            status = cdd.LPStatusType.DUAL_INCONSISTENT
+        else:
+            status = cdd.LPStatusType.UNDECIDED
+        return LinProgResult(status, 0.0, (0.0,) * num_vars)
+
+_SOLVERS = {
+    'cdd': LinProgSolverCdd,
+    'numpy': LinProgSolverNumpy,
+    'scipy': LinProgSolverScipy,
+    }
+
+def make_solver(solver=None, number_type='float'):
+    """Construct a solver.
+
+    :param solver: The name of the solver (see above), or a solver.
+        If :const:`None`, then ``'cdd'`` is used.
+    :type solver: :class:`str` or :class:`LinProgSolver`
+    :param number_type: The number type of the linear programs.
+    :type number_type: :class:`str`
+    :return: The solver.
+    :rtype: :class:`LinProgSolver`
+
+    >>> make_solver(number_type='fraction') # doctest: +ELLIPSIS
+    <improb.linprog.LinProgSolverCdd object at ...>
+    >>> make_solver('numpy', number_type='fraction')
+    Traceback (most recent call last):
+        ...
+    ValueError: numpy solver requires float number type
+    >>> make_solver('glpk')
+    Traceback (most recent call last):
+        ...
+    ValueError: invalid solver 'glpk'
+    """
+    if isinstance(solver, LinProgSolver):
+        if solver.number_type != number_type:
+            raise ValueError("number type mismatch")
+        return solver
+    if solver is None:
+        solver = 'cdd'
+    try:
+        cls = _SOLVERS[solver]
+    except KeyError:
+        raise ValueError("invalid solver '{0}'".format(solver))
+    return cls(number_type)
+
+def solve(matrix, solver=None):
+    """Solve the linear program represented by *matrix*, with the
+    given solver (see :func:`make_solver`).
+
+    :param matrix: The linear program.
+    :type matrix: :class:`cdd.Matrix`
+    :param solver: The solver.
+    :type solver: :class:`str` or :class:`LinProgSolver`
+    :return: The result.
+    :rtype: :class:`LinProgResult`
+    """
+    return make_solver(solver, matrix.number_type).solve(matrix)
+
+def make_matrix(rows, col_size, lin_set=(), number_type='float'):
+    """Construct an inequality matrix from sparse rows. Each row is a
+    mapping from column index to the (non-zero) coefficient of that
+    column; missing columns are zero. Column 0 holds the constant
+    term. The rows are only expanded to dense rows here, as
+    :class:`cdd.Matrix` requires dense rows.
+
+    :param rows: The sparse rows.
+    :type rows: iterable of :class:`dict`
+    :param col_size: The number of columns.
+    :type col_size: :class:`int`
+    :param lin_set: The indices of rows which are equalities.
+    :type lin_set: iterable of :class:`int`
+    :param number_type: The number type of the matrix.
+    :type number_type: :class:`str`
+    :return: The matrix.
+    :rtype: :class:`cdd.Matrix`
+
+    >>> matrix = make_matrix([{0: 1, 2: -1}, {1: 1}], 3, lin_set=[0])
+    >>> print(matrix)
+    H-representation
+    linearity 1  1
+    begin
+     2 3 real
+      1  0 -1
+      0  1  0
+    end
+    """
+    matrix = cdd.Matrix([make_dense_row(row, col_size) for row in rows],
+                        number_type=number_type)
+    matrix.lin_set = frozenset(lin_set)
+    matrix.rep_type = cdd.RepType.INEQUALITY
+    return matrix
+
+def make_dense_row(row, col_size):
+    """Expand a sparse row (see :func:`make_matrix`) into a list.
+
+    >>> make_dense_row({0: 1, 3: 2}, 5)
+    [1, 0, 0, 2, 0]
+    """
+    dense_row = [0] * col_size
+    for col, value in row.iteritems():
+        dense_row[col] = value
+    return dense_row
@@ -71,6 +71,38 @@ class LowPrev(collections.MutableMapping, cdd.NumberTypeable):
         gamble = self.make_gamble(gamble)
         return -self.get_lower(gamble=-gamble, event=event, algorithm=algorithm)
 
+    def get_lower_many(self, gambles, event=True, algorithm=None):
+        """Return the lower expectations for *gambles*, all
+        conditional on the same *event*, in the order in which the
+        gambles are given. This implementation simply calls
+        :meth:`get_lower` for every gamble; derived classes can
+        override it to share work between the gambles.
+
+        :param gambles: The gambles whose lower expectation to find.
+        :type gambles: :class:`collections.Iterable` of |gambletype|
+        :param event: The event to condition on.
+        :type event: |eventtype|
+        :param algorithm: The algorithm to use (:const:`None` for the
+            most efficient algorithm).
+        :type algorithm: :class:`str`
+        :return: The lower bounds of the expectations.
+        :rtype: :class:`list`
+        """
+        return [self.get_lower(gamble, event=event, algorithm=algorithm)
+                for gamble in gambles]
+
+    def get_upper_many(self, gambles, event=True, algorithm=None):
+        """Return the upper expectations for *gambles*, all
+        conditional on the same *event*, in the order in which the
+        gambles are given. See :meth:`get_lower_many`.
+
+        :return: The upper bounds of the expectations.
+        :rtype: :class:`list`
+        """
+        return [-value for value in self.get_lower_many(
+            [-self.make_gamble(gamble) for gamble in gambles],
+            event=event, algorithm=algorithm)]
+
     def make_gamble(self, gamble):
         return self.pspace.make_gamble(gamble, self.number_type)
 
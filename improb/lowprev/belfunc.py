@@ -20,6 +20,7 @@
 from __future__ import division, absolute_import, print_function
 
 from improb import PSpace, Gamble, Event
+from improb.lowprev import LowPrev
 from improb.lowprev.lowprob import LowProb
 
 class BelFunc(LowProb):
@@ -146,3 +147,15 @@ class BelFunc(LowProb):
         if event is not True:
             raise NotImplementedError
         return self.mobius.get_bba_choquet(gamble)
+
+    def get_lower_many(self, gambles, event=True, algorithm='mobius'):
+        """Calculate lower expectations of many gambles conditional on
+        the same event, see :meth:`get_lower`.
+        """
+        # default algorithm
+        if algorithm is None:
+            algorithm = 'mobius'
+        # other algorithm?
+        if algorithm != 'mobius':
+            return LowProb.get_lower_many(self, gambles, event, algorithm)
+        return LowPrev.get_lower_many(self, gambles, event, algorithm)
@@ -20,6 +20,7 @@
 from __future__ import division, absolute_import, print_function
 
 from improb import PSpace, Gamble, Event
+from improb.lowprev import LowPrev
 from improb.lowprev.belfunc import BelFunc
 
 class LinVac(BelFunc):
@@ -116,5 +117,17 @@ class LinVac(BelFunc):
              + epsilon)
             )
 
+    def get_lower_many(self, gambles, event=True, algorithm='linvac'):
+        """Calculate lower expectations of many gambles conditional on
+        the same event, see :meth:`get_lower`.
+        """
+        # default algorithm
+        if algorithm is None:
+            algorithm = 'linvac'
+        # other algorithm?
+        if algorithm != 'linvac':
+            return BelFunc.get_lower_many(self, gambles, event, algorithm)
+        return LowPrev.get_lower_many(self, gambles, event, algorithm)
+
     def get_extend_domain(self):
         return ((event, True) for event in self.pspace.subsets(size=1))
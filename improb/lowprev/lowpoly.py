@@ -24,9 +24,15 @@ import collections
 from fractions import Fraction
 import itertools
 import math
+import multiprocessing
 import random
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 from improb import PSpace, Gamble, Event
+import improb.linprog
 from improb.lowprev import LowPrev
 from improb.setfunction import SetFunction
 
@@ -59,6 +65,22 @@ class LowPoly(LowPrev):
     2 3 0 0 | a b c d : [3/2  , 19/10]
     0 0 1 8 |     c d : [6/5  ,      ]
     """
+    #: The linear programming solver, see :func:`improb.linprog.make_solver`.
+    #: The default (:const:`None`) uses :class:`cdd.LinProg`. For
+    #: the float number type, setting this to ``'numpy'`` or
+    #: ``'scipy'`` can be much faster on large problems.
+    solver = None
+
+    #: Symmetry of the lower prevision: :meth:`extend`,
+    #: :meth:`get_coherent`, and :meth:`is_coherent` solve only one
+    #: linear program for all gamble/event pairs which are
+    #: equivalent under it. The default (:const:`None`) ignores
+    #: symmetry. If :const:`True`, exchangeable elements are detected
+    #: among the whole possibility space; otherwise, specify a
+    #: sequence of events, within which exchangeable elements are
+    #: detected. See :meth:`get_symmetry`.
+    symmetry = None
+
     def __init__(self, pspace=None, mapping=None,
                  lprev=None, uprev=None, prev=None,
                  lprob=None, uprob=None, prob=None,
@@ -251,8 +273,8 @@ class LowPoly(LowPrev):
                 pspace=self.pspace,
                 data=bba,
                 number_type=self.number_type)
-            for event in self.pspace.subsets():
-                self.set_lower(event, setfunc.get_zeta(event))
+            for event, value in setfunc.get_zeta_transform().iteritems():
+                self.set_lower(event, value)
         if credalset:
             # set up polyhedral representation
             mat = cdd.Matrix([(['1'] + credalprob) for credalprob in credalset])
@@ -280,11 +302,20 @@ class LowPoly(LowPrev):
         return self._mapping[self._make_key(key)]
 
     def __setitem__(self, key, value):
-        self._mapping[self._make_key(key)] = self._make_value(value)
-        self._clear_cache()
+        key = self._make_key(key)
+        value = self._make_value(value)
+        old_value = self._mapping.get(key)
+        self._mapping[key] = value
+        self._update_avoiding_sure_loss(old_value, value)
+        if old_value is None:
+            self._update_cache(key, value)
+        else:
+            self._clear_cache()
 
     def __delitem__(self, key):
-        del self._mapping[self._make_key(key)]
+        key = self._make_key(key)
+        old_value = self._mapping.pop(key)
+        self._update_avoiding_sure_loss(old_value, None)
         self._clear_cache()
 
     def __str__(self):
@@ -348,97 +379,111 @@ class LowPoly(LowPrev):
         return matrix
 
     def _get_relevant_items(self, event=True, items=None):
-        """Helper function for get_relevant_items."""
+        """Helper function for get_relevant_items.
+
+        The algorithm iterates from *items* (all items if not
+        specified), which must contain all relevant items. In every
+        iteration, the columns of items which are not relevant are
+        dropped from the linear program.
+
+        :return: The relevant items, and the number of iterations.
+        :rtype: :class:`tuple`
+        """
         # start with all items
         if items is None:
             items = set(self.iteritems())
+        items = set(items)
         if not items:
             # special case: no items!
-            return []
+            return items, 0
         compl_event = self.pspace.make_event(event).complement()
         if compl_event.is_false():
             # special case: unconditional, no need to check further
-            return items
-        # construct set of all conditioning events
-        # (we need a variable tau_i for each of these)
-        evs = set(ev for (ga, ev), (lprev, uprev) in items)
-        num_evs = len(evs)
-        # construct lists of lower and upper assessments
-        # (we need a variable lambda_i for each of these)
-        low_items = [((ga, ev), (lprev, uprev))
-                     for (ga, ev), (lprev, uprev) in items
-                     if lprev is not None]
-        upp_items = [((ga, ev), (lprev, uprev))
-                     for (ga, ev), (lprev, uprev) in items
-                     if uprev is not None]
-        num_items = len(low_items + upp_items)
-        # construct the linear program
-        matrix = cdd.Matrix(
-            # tau_i >= 0
-            [([0]
-              + [(1 if i == j else 0) for i in xrange(num_evs)]
-              + [0 for i in xrange(num_items)])
-             for j in xrange(num_evs)]
-            +
-            # tau_i <= 1
-            [([1]
-              + [(-1 if i == j else 0) for i in xrange(num_evs)]
-              + [0 for i in xrange(num_items)])
-             for j in xrange(num_evs)]
-            +
-            # lambda_i >= 0
-            [([0]
-              + [0 for i in xrange(num_evs)]
-              + [(1 if i == j else 0) for i in xrange(num_items)])
-             for j in xrange(num_items)]
-            +
-            # sum_{i,j,k}
-            #  - tau_k ev_k[omega]
-            #  - lambda_i (ga_i[omega] - lprev_i)
-            #  - lambda_j (uprev_j - ga_j[omega]) >= 0
-            [([0]
-              + [-1 if (omega in ev) else 0 for ev in evs]
-              + [(lprev - ga[omega]) if omega in ev else 0
-                 for (ga, ev), (lprev, uprev) in low_items]
-              + [(ga[omega] - uprev) if omega in ev else 0
-                 for (ga, ev), (lprev, uprev) in upp_items]
-              )
-              for omega in compl_event],
-            number_type=self.number_type)
-        matrix.rep_type = cdd.RepType.INEQUALITY
-        matrix.obj_type = cdd.LPObjType.MAX
-        # sum over all tau_i
-        matrix.obj_func = [0] + [1] * num_evs + [0] * num_items
-        #print(matrix) # DEBUG
-        linprog = cdd.LinProg(matrix)
-        linprog.solve()
-        #print(linprog.primal_solution) # DEBUG
-        if linprog.status != cdd.LPStatusType.OPTIMAL:
-            raise RuntimeError(
-                "BUG: unexpected status (%i)\n"
-                "conditioning event:\n%s\n"
-                "lower prevision:\n%s"
-                % (linprog.status, event, self))
-        # calculate set of events for which tau is 1
-        new_evs = set()
-        for tau, ev in itertools.izip(
-            linprog.primal_solution[:num_evs], evs):
-            if self.number_cmp(tau, 1) == 0:
-                new_evs.add(ev)
-            elif self.number_cmp(tau) != 0:
-                raise RuntimeError("unexpected solution for tau: {0}".format(tau))
-        # derive new set of items
-        new_items = set(
-            ((ga, ev), (lprev, uprev))
-            for (ga, ev), (lprev, uprev) in items
-            if ev in new_evs)
-        if items == new_items:
-            # if all tau were 1, we are done
-            return items
-        else:
+            return items, 0
+        # columns of the constraints for each omega in compl_event
+        # (these are calculated only once for all iterations)
+        ev_columns = {}
+        low_columns = {}
+        upp_columns = {}
+        for (ga, ev), (lprev, uprev) in items:
+            if ev not in ev_columns:
+                ev_columns[ev] = [-1 if (omega in ev) else 0
+                                  for omega in compl_event]
+            if lprev is not None:
+                low_columns[ga, ev] = [
+                    (lprev - ga[omega]) if omega in ev else 0
+                    for omega in compl_event]
+            if uprev is not None:
+                upp_columns[ga, ev] = [
+                    (ga[omega] - uprev) if omega in ev else 0
+                    for omega in compl_event]
+        num_iterations = 0
+        while True:
+            num_iterations += 1
+            # construct list of all conditioning events
+            # (we need a variable tau_i for each of these)
+            evs = list(set(ev for (ga, ev), (lprev, uprev) in items))
+            num_evs = len(evs)
+            # construct lists of lower and upper assessments
+            # (we need a variable lambda_i for each of these)
+            columns = (
+                [ev_columns[ev] for ev in evs]
+                + [low_columns[key] for key, (lprev, uprev) in items
+                   if lprev is not None]
+                + [upp_columns[key] for key, (lprev, uprev) in items
+                   if uprev is not None])
+            num_items = len(columns) - num_evs
+            # construct the linear program
+            matrix = improb.linprog.make_matrix(
+                # tau_i >= 0
+                [{1 + j: 1} for j in xrange(num_evs)]
+                +
+                # tau_i <= 1
+                [{0: 1, 1 + j: -1} for j in xrange(num_evs)]
+                +
+                # lambda_i >= 0
+                [{1 + num_evs + j: 1} for j in xrange(num_items)]
+                +
+                # sum_{i,j,k}
+                #  - tau_k ev_k[omega]
+                #  - lambda_i (ga_i[omega] - lprev_i)
+                #  - lambda_j (uprev_j - ga_j[omega]) >= 0
+                [dict((1 + j, column[row])
+                      for j, column in enumerate(columns) if column[row])
+                 for row in xrange(len(compl_event))],
+                1 + len(columns), number_type=self.number_type)
+            matrix.obj_type = cdd.LPObjType.MAX
+            # sum over all tau_i
+            matrix.obj_func = [0] + [1] * num_evs + [0] * num_items
+            #print(matrix) # DEBUG
+            linprog = improb.linprog.solve(matrix, self.solver)
+            #print(linprog.primal_solution) # DEBUG
+            if linprog.status != cdd.LPStatusType.OPTIMAL:
+                raise RuntimeError(
+                    "BUG: unexpected status (%i)\n"
+                    "conditioning event:\n%s\n"
+                    "lower prevision:\n%s"
+                    % (linprog.status, event, self))
+            # calculate set of events for which tau is 1
+            new_evs = set()
+            for tau, ev in itertools.izip(
+                linprog.primal_solution[:num_evs], evs):
+                if self.number_cmp(tau, 1) == 0:
+                    new_evs.add(ev)
+                elif self.number_cmp(tau) != 0:
+                    raise RuntimeError(
+                        "unexpected solution for tau: {0}".format(tau))
+            # derive new set of items
+            new_items = set(
+                ((ga, ev), (lprev, uprev))
+                for (ga, ev), (lprev, uprev) in items
+                if ev in new_evs)
+            if items == new_items or not new_items:
+                # if all tau were 1, we are done
+                return new_items, num_iterations
             # otherwise, reiterate the algorithm with the reduced set
             # of items
-            return self._get_relevant_items(event=event, items=new_items)
+            items = new_items
 
     def get_relevant_items(self, event=True):
         """Calculate the relevant items for calculating the natural
@@ -448,6 +493,11 @@ class LowPoly(LowPrev):
         and Vicig (2004) [#walley2004]_. Also see their Algorithm 2,
         which is a special case of Algorithm 4 but with event equal to
         the empty set.
+
+        The relevant items for an event are a subset of the relevant
+        items for any larger event, so the algorithm starts from the
+        smallest set of relevant items already found for a larger
+        event.
         """
         # implementation detail: this is cached; delete
         # _relevant_items whenever cache needs to be cleared
@@ -456,12 +506,42 @@ class LowPoly(LowPrev):
             return self._relevant_items[event]
         except AttributeError:
             self._relevant_items = {}
+            self._relevant_items_iterations = {}
         except KeyError:
             pass
-        relevant_items = self._get_relevant_items(event=event)
+        items = None
+        for other_event, other_items in self._relevant_items.iteritems():
+            if event <= other_event and (
+                items is None or len(other_items) < len(items)):
+                items = other_items
+        relevant_items, num_iterations = self._get_relevant_items(
+            event=event, items=items)
         self._relevant_items[event] = relevant_items
+        self._relevant_items_iterations[event] = num_iterations
         return relevant_items
 
+    def get_relevant_items_iterations(self, event=True):
+        """Number of iterations (i.e. linear programs) which
+        :meth:`get_relevant_items` needed for the given event.
+
+        >>> lpr = LowPoly(pspace='abc', number_type='fraction')
+        >>> lpr.set_lower([1, 0, 0], '0.2', event='ab')
+        >>> lpr.set_upper([0, 0, 1], '0.3')
+        >>> lpr.get_relevant_items_iterations(event=True)
+        0
+        >>> lpr.get_relevant_items_iterations(event='ab')
+        1
+        >>> lpr.get_relevant_items_iterations(event='c')
+        1
+        >>> lpr.get_relevant_items(event='c') # P(c) <= 3/10 < 1
+        set([])
+        >>> lpr.get_relevant_items_iterations(event=False)
+        0
+        """
+        self.get_relevant_items(event=event)
+        return self._relevant_items_iterations[
+            self.pspace.make_event(event)]
+
     def _make_key(self, key):
         """Helper function to construct a key for the internal
         mapping. This implementation returns a gamble/event pair.
@@ -482,49 +562,122 @@ class LowPoly(LowPrev):
 
     def _get_matrix(self, event=True):
         """Construct cdd matrix representation."""
-        event = self.pspace.make_event(event)
-        constraints = []
-        lin_set = set()
+        rows, lin_set = self._get_sparse_constraints(event)
+        matrix = improb.linprog.make_matrix(
+            rows, len(self.pspace) + 1, lin_set, self.number_type)
+        matrix.obj_type = cdd.LPObjType.MIN
+        return matrix
 
-        def add_constraint(constraint, linear=False):
-            if linear:
-                lin_set.add(len(constraints))
-            constraints.append(constraint)
+    def _get_sparse_constraints(self, event=True):
+        """Helper function to construct the constraints of the cdd
+        matrix representation as sparse rows, which only hold the
+        non-zero coefficients (see :func:`improb.linprog.make_matrix`),
+        so memory scales with the size of the conditioning events
+        rather than with the size of the possibility space.
 
+        :return: The rows, and the indices of linear rows.
+        :rtype: :class:`list` of :class:`dict`, and :class:`set`
+        """
+        event = self.pspace.make_event(event)
+        index = self.pspace.index
         # probabilities sum to one over the event
-        add_constraint(
-            [+1] + [(-1 if omega in event else 0) for omega in self.pspace],
-            linear=True)
+        row = dict((1 + index(omega), -1) for omega in event)
+        row[0] = 1
+        rows = [row]
+        lin_set = set([0])
         # probabilities are positive
-        for j in self.pspace:
-            add_constraint([0] + [1 if i == j else 0 for i in self.pspace])
+        rows.extend({1 + j: 1} for j in xrange(len(self.pspace)))
         # add constraints on conditional expectation
-        for (ga, ev), (lprev, uprev) in self.get_relevant_items(event=event):
-            if lprev is None and uprev is None:
-                # nothing assigned
-                continue
-            elif lprev == uprev:
-                # precise assignment
-                add_constraint(
-                    [0] + [value - lprev if omega in ev else 0
-                           for omega, value in ga.iteritems()],
-                    linear=True)
-            else:
-                # interval assignment
-                if lprev is not None:
-                    add_constraint(
-                        [0] + [value - lprev if omega in ev else 0
-                               for omega, value in ga.iteritems()])
-                if uprev is not None:
-                    add_constraint(
-                        [0] + [uprev - value if omega in ev else 0
-                               for omega, value in ga.iteritems()])
-        # create matrix
-        matrix = cdd.Matrix(constraints, number_type=self.number_type)
-        matrix.lin_set = lin_set
-        matrix.rep_type = cdd.RepType.INEQUALITY
-        matrix.obj_type = cdd.LPObjType.MIN
-        return matrix
+        for item in self.get_relevant_items(event=event):
+            for row, linear in self._get_constraints(item):
+                if linear:
+                    lin_set.add(len(rows))
+                rows.append(row)
+        return rows, lin_set
+
+    def _get_constraints(self, item):
+        """Helper function to construct the constraints of a single
+        item (i.e. a key/value pair) for the cdd matrix
+        representation. Only elements of the conditioning event
+        have non-zero coefficients.
+
+        :return: Yields each constraint as a sparse row (see
+            :func:`improb.linprog.make_matrix`), along with a flag
+            whether the constraint is linear.
+        :rtype: Yields a :class:`dict` and a :class:`bool`.
+        """
+        (ga, ev), (lprev, uprev) = item
+        if lprev is None and uprev is None:
+            # nothing assigned
+            return
+        index = self.pspace.index
+        columns = [(1 + index(omega), ga[omega]) for omega in ev]
+        if lprev == uprev:
+            # precise assignment
+            yield (dict((col, value - lprev) for col, value in columns
+                        if value != lprev),
+                   True)
+        else:
+            # interval assignment
+            if lprev is not None:
+                yield (dict((col, value - lprev) for col, value in columns
+                            if value != lprev),
+                       False)
+            if uprev is not None:
+                yield (dict((col, uprev - value) for col, value in columns
+                            if value != uprev),
+                       False)
+
+    def _update_cache(self, key, value):
+        """Update the cache after a new key has been added.
+
+        Unconditionally, all items are relevant, so the new
+        constraints are simply appended to a copy of the cached matrix
+        (the cached matrix may have been returned by
+        :meth:`get_matrix`, so it must not change). For any other
+        conditioning event, the relevant items may change, so its
+        cache is cleared.
+
+        >>> lpr = LowPoly(pspace='abc', lprob={'a': '0.1', 'b': '0.2'})
+        >>> matrix = lpr.get_matrix()
+        >>> matrix.row_size
+        6
+        >>> lpr.set_lower([0, 0, 1], '0.3')
+        >>> matrix.row_size, lpr.get_matrix().row_size
+        (6, 7)
+        """
+        true_event = self.pspace.make_event(True)
+        try:
+            relevant_items = self._relevant_items.get(true_event)
+        except AttributeError:
+            relevant_items = None
+        try:
+            matrix = self._matrix.get(true_event)
+        except AttributeError:
+            matrix = None
+        try:
+            num_queries = self._num_queries
+        except AttributeError:
+            num_queries = None
+        self._clear_cache()
+        if relevant_items is None:
+            return
+        relevant_items = set(relevant_items)
+        relevant_items.add((key, value))
+        self._relevant_items = {true_event: relevant_items}
+        self._relevant_items_iterations = {true_event: 0}
+        if matrix is not None:
+            matrix = matrix.copy()
+            for row, linear in self._get_constraints((key, value)):
+                matrix.extend(
+                    [improb.linprog.make_dense_row(row, matrix.col_size)],
+                    linear=linear)
+            # extend resets the representation and objective types
+            matrix.rep_type = cdd.RepType.INEQUALITY
+            matrix.obj_type = cdd.LPObjType.MIN
+            self._matrix = {true_event: matrix}
+        if num_queries is not None:
+            self._num_queries = num_queries
 
     def _clear_cache(self):
         # clear matrix cache
@@ -532,10 +685,26 @@ class LowPoly(LowPrev):
             del self._matrix
         except AttributeError:
             pass
+        try:
+            del self._vertices
+        except AttributeError:
+            pass
+        try:
+            del self._num_queries
+        except AttributeError:
+            pass
         try:
             del self._relevant_items
         except AttributeError:
             pass
+        try:
+            del self._relevant_items_iterations
+        except AttributeError:
+            pass
+        try:
+            del self._symmetry_blocks
+        except AttributeError:
+            pass
 
     @property
     def pspace(self):
@@ -620,33 +789,181 @@ class LowPoly(LowPrev):
         """Calculate lower expectation, using Algorithm 4 of Walley,
         Pelessoni, and Vicig (2004) [#walley2004]_. The algorithm
         deals properly with zero probabilities.
+
+        The following algorithms are supported:
+
+        * ``'linprog'`` (the default, also used if :const:`None`):
+          solve a linear program.
+
+        * ``'vertices'``: take the minimal expectation over the
+          extreme points of the credal set; the extreme points are
+          enumerated once, and cached for every conditioning event.
+
+        * ``'auto'``: for the float number type, if numpy is
+          installed, use ``'vertices'`` once the number of queries
+          conditional on the event exceeds the number of constraints,
+          unless there are too many extreme points (see
+          :attr:`max_vertices_factor`); use ``'linprog'`` otherwise.
+          For exact arithmetic, linear programming is faster.
+
+        >>> lpr = LowPoly(pspace='abc', number_type='fraction')
+        >>> lpr.set_lower([1, 0, 0], '0.2')
+        >>> lpr.set_upper([0, 1, 0], '0.3')
+        >>> print(lpr.get_lower([1, 2, 3], algorithm='linprog'))
+        1
+        >>> print(lpr.get_lower([1, 2, 3], algorithm='vertices'))
+        1
+        >>> print(lpr.get_lower([3, 2, 1], event='bc', algorithm='vertices'))
+        1
+        >>> print(lpr.get_lower([1, 2, 3], algorithm='auto'))
+        1
+        """
+        return LowPoly.get_lower_many(self, [gamble], event, algorithm)[0]
+
+    #: If there are more than this many extreme points per constraint,
+    #: then the ``'auto'`` algorithm of :meth:`get_lower` does not use
+    #: the extreme points.
+    max_vertices_factor = 64
+
+    def get_lower_many(self, gambles, event=True, algorithm='linprog'):
+        """Calculate lower expectations of many gambles conditional on
+        the same event, see :meth:`get_lower`. Avoiding sure loss is
+        checked once, and the constraint matrix (or the set of
+        extreme points) is constructed once for all gambles.
+
+        >>> lpr = LowPoly(pspace='abc', number_type='fraction')
+        >>> lpr.set_lower([1, 0, 0], '0.2')
+        >>> lpr.set_upper([0, 1, 0], '0.3')
+        >>> gambles = [[1, 0, 0], [0, 1, 1], [1, 2, 3]]
+        >>> print(" ".join(str(x) for x in lpr.get_lower_many(gambles)))
+        1/5 0 1
+        >>> print(" ".join(str(x) for x in lpr.get_upper_many(gambles)))
+        1 4/5 13/5
+        >>> print(" ".join(str(x) for x in lpr.get_lower_many(gambles, 'bc')))
+        0 1 2
         """
-        # set fastest algorithm
-        if algorithm is None:
-            algorithm = 'linprog'
         # check algorithm
-        if algorithm != 'linprog':
+        if algorithm not in (None, 'linprog', 'vertices', 'auto'):
             raise ValueError("invalid algorithm '{0}'".format(algorithm))
         # check avoiding sure loss (just in case)
         if not self.is_avoiding_sure_loss():
             raise ValueError(
                 "lower prevision incurs sure loss:\n{0}".format(self))
-        # get the matrix
-        matrix = self.get_matrix(gamble, event)
-        #print(matrix) # DEBUG
-        linprog = cdd.LinProg(matrix)
-        linprog.solve()
-        #print(linprog) # DEBUG
-        if linprog.status != cdd.LPStatusType.OPTIMAL:
-            raise RuntimeError(
-                "BUG: unexpected status (%i)\n"
-                "gamble:\n%s\n"
-                "conditioning event:\n%s\n"
-                "lower prevision:\n%s\n"
-                "matrix:\n%s\n"
-                "linear program:\n%s\n"
-                % (linprog.status, gamble, event, self, matrix, linprog))
-        return linprog.obj_value
+        event = self.pspace.make_event(event)
+        gambles = [self.make_gamble(gamble) for gamble in gambles]
+        # set fastest algorithm
+        if algorithm == 'auto':
+            algorithm = self._get_lower_algorithm(event, len(gambles))
+        if algorithm == 'vertices':
+            return self._get_lower_many_vertices(gambles, event)
+        else:
+            return self._get_lower_many_linprog(gambles, event)
+
+    def _get_lower_algorithm(self, event, num_gambles):
+        """Helper function to select the algorithm for
+        :meth:`get_lower_many`.
+        """
+        if numpy is None or self.number_type != 'float':
+            return 'linprog'
+        # implementation detail: number of queries for each event is
+        # cached in _num_queries
+        try:
+            num_queries = self._num_queries.get(event, 0) + num_gambles
+        except AttributeError:
+            self._num_queries = {}
+            num_queries = num_gambles
+        self._num_queries[event] = num_queries
+        try:
+            vertices, array = self._vertices[event]
+        except (AttributeError, KeyError):
+            num_constraints = self.get_matrix(None, event).row_size
+            if num_queries < num_constraints:
+                # not worth enumerating extreme points yet
+                return 'linprog'
+            vertices, array = self._get_vertices(event)
+        else:
+            num_constraints = self.get_matrix(None, event).row_size
+        if len(vertices) > self.max_vertices_factor * num_constraints:
+            return 'linprog'
+        return 'vertices'
+
+    def _get_lower_many_linprog(self, gambles, event):
+        """Helper function for :meth:`get_lower_many`, solving a
+        linear program for each gamble.
+        """
+        # get the matrix, this is shared by all linear programs
+        matrix = self.get_matrix(None, event)
+        solver = improb.linprog.make_solver(self.solver, self.number_type)
+        results = []
+        for gamble in gambles:
+            matrix.obj_func = [0] + [value if omega in event else 0
+                                     for omega, value in gamble.iteritems()]
+            #print(matrix) # DEBUG
+            linprog = solver.solve(matrix)
+            #print(linprog) # DEBUG
+            if linprog.status != cdd.LPStatusType.OPTIMAL:
+                raise RuntimeError(
+                    "BUG: unexpected status (%i)\n"
+                    "gamble:\n%s\n"
+                    "conditioning event:\n%s\n"
+                    "lower prevision:\n%s\n"
+                    "matrix:\n%s\n"
+                    % (linprog.status, gamble, event, self, matrix))
+            results.append(linprog.obj_value)
+        return results
+
+    def _get_lower_many_vertices(self, gambles, event):
+        """Helper function for :meth:`get_lower_many`, minimizing
+        the expectation over the extreme points of the credal set.
+        """
+        vertices, array = self._get_vertices(event)
+        if not gambles:
+            return []
+        if array is not None:
+            # extreme points are zero outside event, so no need to
+            # restrict the gambles
+            values = numpy.dot(
+                array,
+                numpy.array([gamble.as_array() for gamble in gambles]).T)
+            return values.min(axis=0).tolist()
+        return [min(sum(prob * value
+                        for prob, value
+                        in itertools.izip(vertex, gamble.itervalues())
+                        if prob)
+                    for vertex in vertices)
+                for gamble in gambles]
+
+    def _get_vertices(self, event):
+        """Helper function to get the extreme points of the credal
+        set conditional on event, as a list of tuples, along with
+        a :class:`numpy.ndarray` with one row for each extreme point
+        (or :const:`None` if the number type is not float, or if numpy
+        is not installed).
+        """
+        # implementation detail: this is cached; delete _vertices
+        # whenever cache needs to be cleared
+        try:
+            return self._vertices[event]
+        except AttributeError:
+            self._vertices = {}
+        except KeyError:
+            pass
+        poly = cdd.Polyhedron(self.get_matrix(None, event))
+        vertices = []
+        for vert in poly.get_generators():
+            if not vert[0]:
+                # a ray, which is zero on the event
+                continue
+            vert = tuple(vert[i + 1] if omega in event else 0
+                         for i, omega in enumerate(self.pspace))
+            if vert not in vertices:
+                vertices.append(vert)
+        if numpy is not None and self.number_type == 'float':
+            array = numpy.array(vertices, dtype=float)
+        else:
+            array = None
+        self._vertices[event] = vertices, array
+        return vertices, array
 
     def get_credal_set(self, event=True):
         """Return extreme points of the credal set conditional on event.
@@ -655,33 +972,40 @@ class LowPoly(LowPrev):
         :rtype: Yields a :class:`tuple` for each extreme point.
         """
         event = self.pspace.make_event(event)
-        poly = cdd.Polyhedron(self.get_matrix({}, event))
-        verts = set()
-        for vert in poly.get_generators():
-            if event.is_true():
-                yield vert[1:]
-            else:
-                vert = tuple(vert[i + 1] if omega in event else 0
-                             for i, omega in enumerate(self.pspace))
-                if vert not in verts:
-                    yield vert
-                verts.add(vert)
-
-    def get_coherent(self, algorithm='linprog'):
-        """Return a coherent version, using linear programming."""
+        vertices, array = self._get_vertices(event)
+        for vert in vertices:
+            yield vert
+
+    def get_coherent(self, algorithm='linprog', workers=None):
+        """Return a coherent version, using linear programming.
+
+        :param workers: If specified, the number of worker processes
+            among which the linear programs are distributed.
+        :type workers: :class:`int`
+        """
         if not self.is_avoiding_sure_loss():
             raise ValueError('incurs sure loss')
         # copy the assignments
         mapping = dict(self.iteritems())
-        # note: we wrap iteritems in a list because we're changing the
-        # mapping as we iterate
-        for (gamble, event), (lprev, uprev) in list(mapping.iteritems()):
+        keys = list(mapping)
+        # calculate all lower and upper previsions, with one batch
+        # for each conditioning event
+        lprevs = iter(self._get_lower_many_by_event(
+            ((gamble, event) for gamble, event in keys
+             if mapping[gamble, event][0] is not None),
+            algorithm, workers))
+        uprevs = iter(self._get_lower_many_by_event(
+            ((-gamble, event) for gamble, event in keys
+             if mapping[gamble, event][1] is not None),
+            algorithm, workers))
+        for key in keys:
             # fix lower and upper previsions
+            lprev, uprev = mapping[key]
             if lprev is not None:
-                lprev = self.get_lower(gamble, event, algorithm=algorithm)
+                lprev = next(lprevs)
             if uprev is not None:
-                uprev = self.get_upper(gamble, event, algorithm=algorithm)
-            mapping[gamble, event] = lprev, uprev
+                uprev = -next(uprevs)
+            mapping[key] = lprev, uprev
         # create new lower prevision (of the same class)
         return self.__class__(
             pspace=self.pspace,
@@ -743,41 +1067,243 @@ class LowPoly(LowPrev):
         """
         if keys is None:
             keys = self.get_extend_domain()
+        keys = [(self.make_gamble(gamble), event) for gamble, event in keys]
+        # calculate all natural extensions first, with one batch for
+        # each conditioning event (adding the natural extension to
+        # the assessments does not change the natural extension)
+        lprevs = iter(self._get_lower_many_by_event(
+            keys if lower else [], algorithm))
+        uprevs = iter(self._get_lower_many_by_event(
+            ((-gamble, event) for gamble, event in keys) if upper else [],
+            algorithm))
         for gamble, event in keys:
             try:
                 lprev, uprev = self[gamble, event]
             except KeyError:
                 lprev, uprev = None, None
             if lower:
-                lprev = self.get_lower(gamble, event, algorithm)
+                lprev = next(lprevs)
             if upper:
-                uprev = self.get_upper(gamble, event, algorithm)
+                uprev = -next(uprevs)
             self[gamble, event] = lprev, uprev
 
+    def _get_lower_many_by_event(self, keys, algorithm=None, workers=None):
+        """Helper function to calculate the lower prevision of many
+        gamble/event pairs, with a single call to
+        :meth:`get_lower_many` for each conditioning event, or with
+        :meth:`_imap_lower` if *workers* is specified.
+
+        Equivalent pairs under :meth:`get_symmetry` have the same
+        lower prevision, so it is only calculated for the first pair of
+        every orbit.
+
+        :return: The lower previsions, in the order of *keys*.
+        :rtype: :class:`list`
+        """
+        keys = list(keys)
+        orbit_keys = self._get_orbit_keys(keys)
+        if orbit_keys is not None:
+            firsts, indices = _get_first_indices(orbit_keys)
+            keys = [keys[first] for first in firsts]
+        results = [None] * len(keys)
+        if workers is not None:
+            for index, value in self._imap_lower(keys, algorithm, workers):
+                results[index] = value
+        else:
+            items = collections.defaultdict(list)
+            for index, (gamble, event) in enumerate(keys):
+                items[self.pspace.make_event(event)].append((index, gamble))
+            for event, event_items in items.iteritems():
+                values = self.get_lower_many(
+                    [gamble for index, gamble in event_items], event,
+                    algorithm)
+                for (index, gamble), value in itertools.izip(
+                    event_items, values):
+                    results[index] = value
+        if orbit_keys is not None:
+            return [results[index] for index in indices]
+        return results
+
+    def _imap_lower(self, keys, algorithm, workers):
+        """Helper function to calculate the lower prevision of many
+        gamble/event pairs by linear programming, in a pool of
+        *workers* processes. Each task sends the sparse rows of the
+        constraint matrix along with a chunk of sparse objective
+        functions; these are only expanded by the worker.
+
+        :return: Yields the index of each gamble/event pair in
+            *keys*, along with its lower prevision, in order of
+            completion.
+        """
+        if algorithm not in (None, 'linprog'):
+            raise ValueError(
+                "algorithm '{0}' does not support workers".format(algorithm))
+        if not self.is_avoiding_sure_loss():
+            raise ValueError(
+                "lower prevision incurs sure loss:\n{0}".format(self))
+        items = collections.defaultdict(list)
+        for index, (gamble, event) in enumerate(keys):
+            items[self.pspace.make_event(event)].append(
+                (index, self.make_gamble(gamble)))
+        tasks = []
+        position = self.pspace.index
+        for event, event_items in items.iteritems():
+            rows, lin_set = self._get_sparse_constraints(event)
+            # a few chunks per worker, to balance the load
+            size = -(-len(event_items) // (4 * workers))
+            for start in xrange(0, len(event_items), size):
+                chunk = event_items[start:start + size]
+                tasks.append((
+                    self.number_type, self.solver, rows, lin_set,
+                    len(self.pspace) + 1,
+                    [index for index, gamble in chunk],
+                    [dict((1 + position(omega), gamble[omega])
+                          for omega in event if gamble[omega])
+                     for index, gamble in chunk]))
+        if not tasks:
+            return
+        pool = multiprocessing.Pool(workers)
+        try:
+            for results in pool.imap_unordered(_solve_linprogs, tasks):
+                for index, value in results:
+                    yield index, value
+        finally:
+            # also stops remaining tasks if we exit early
+            pool.terminate()
+            pool.join()
+
     def is_avoiding_sure_loss(self, algorithm='linprog'):
         """Check avoiding sure loss by linear programming.
 
         This is Algorithm 2 of Walley, Pelessoni, and Vicig (2004)
         [#walley2004]_.
+
+        The result is cached. Changing the assessments keeps the
+        cached result if it cannot change the answer: loosening or
+        removing assessments cannot cause sure loss, and tightening
+        or adding assessments cannot remove sure loss.
+
+        To see which changes keep the cached result, count the linear
+        programs solved:
+
+        >>> class CountingSolver(improb.linprog.LinProgSolverCdd):
+        ...     num_solved = 0
+        ...     def solve(self, matrix):
+        ...         CountingSolver.num_solved += 1
+        ...         return improb.linprog.LinProgSolverCdd.solve(self, matrix)
+        >>> lpr = LowPoly(pspace='abc', number_type='fraction')
+        >>> lpr.solver = CountingSolver('fraction')
+        >>> lpr.set_lower([1, 0, 0], '0.5')
+        >>> lpr.is_avoiding_sure_loss()
+        True
+        >>> lpr.set_lower([0, 1, 0], '0.6')
+        >>> lpr.is_avoiding_sure_loss()
+        False
+        >>> num_solved = CountingSolver.num_solved
+        >>> lpr.set_upper([0, 0, 1], '0.2') # still incurs sure loss
+        >>> lpr.is_avoiding_sure_loss()
+        False
+        >>> CountingSolver.num_solved == num_solved
+        True
+        >>> lpr[[0, 1, 0], True] = ('0.4', None)
+        >>> lpr.is_avoiding_sure_loss()
+        True
+        >>> num_solved = CountingSolver.num_solved
+        >>> lpr[[0, 1, 0], True] = ('0.3', None) # still avoids sure loss
+        >>> lpr.is_avoiding_sure_loss()
+        True
+        >>> CountingSolver.num_solved == num_solved
+        True
+        >>> lpr.set_lower([0, 0, 1], '0.3') # tighter, must be checked again
+        >>> lpr.is_avoiding_sure_loss()
+        False
+        >>> CountingSolver.num_solved > num_solved
+        True
         """
+        # implementation detail: this is cached in _avoiding_sure_loss
+        # and updated in _update_avoiding_sure_loss
+        try:
+            return self._avoiding_sure_loss
+        except AttributeError:
+            pass
         # if there are no relevant items for conditioning on the empty
         # set, then we avoids sure loss
-        return not self.get_relevant_items(event=False)
+        self._avoiding_sure_loss = not self.get_relevant_items(event=False)
+        return self._avoiding_sure_loss
 
-    def is_coherent(self, algorithm='linprog'):
+    def _update_avoiding_sure_loss(self, old_value, value):
+        """Update cached avoiding sure loss status after the value of
+        a key has changed from *old_value* to *value* (either of
+        which is :const:`None` if the key was added or deleted).
+        """
+        try:
+            status = self._avoiding_sure_loss
+        except AttributeError:
+            return
+        old_lprev, old_uprev = old_value or (None, None)
+        lprev, uprev = value or (None, None)
+        is_looser = (
+            (lprev is None
+             or (old_lprev is not None and lprev <= old_lprev))
+            and
+            (uprev is None
+             or (old_uprev is not None and uprev >= old_uprev)))
+        is_tighter = (
+            (old_lprev is None
+             or (lprev is not None and lprev >= old_lprev))
+            and
+            (old_uprev is None
+             or (uprev is not None and uprev <= old_uprev)))
+        if not ((status and is_looser) or (not status and is_tighter)):
+            del self._avoiding_sure_loss
+
+    def is_coherent(self, algorithm='linprog', workers=None):
+        """Check coherence by linear programming.
+
+        :param workers: If specified, the number of worker processes
+            among which the linear programs are distributed. The
+            check stops as soon as an incoherent assessment is found.
+        :type workers: :class:`int`
+
+        >>> lpr = LowPoly(pspace='abc', number_type='fraction')
+        >>> lpr.set_lower([1, 0, 0], '0.2')
+        >>> lpr.set_lower([0, 1, 0], '0.3')
+        >>> lpr.set_upper([1, 1, 0], '0.9')
+        >>> lpr.is_coherent(workers=2)
+        True
+        >>> lpr.set_lower([1, 1, 0], '0.4')
+        >>> lpr.is_coherent(workers=2)
+        False
+        >>> lpr.get_coherent(workers=2).is_coherent()
+        True
+        """
         # first check if we are avoiding sure loss
         if not self.is_avoiding_sure_loss(algorithm):
             return False
-        # we're avoiding sure loss, so check the natural extension
-        for gamble, event in self:
-            lprev, uprev = self[gamble, event]
-            if (lprev is not None
-                and self.number_cmp(
-                    self.get_lower(gamble, event, algorithm), lprev) == 1):
-                return False
-            if (uprev is not None
-                and self.number_cmp(
-                    self.get_upper(gamble, event, algorithm), uprev) == -1):
+        # we're avoiding sure loss, so check the natural extension;
+        # upper previsions are checked as lower previsions of the
+        # negated gamble
+        checks = []
+        for (gamble, event), (lprev, uprev) in self.iteritems():
+            if lprev is not None:
+                checks.append(((gamble, event), lprev))
+            if uprev is not None:
+                checks.append(((-gamble, event), -uprev))
+        # equivalent checks under the symmetry need to be done only once
+        orbit_keys = self._get_orbit_keys([key for key, bound in checks])
+        if orbit_keys is not None:
+            firsts, indices = _get_first_indices(
+                zip(orbit_keys, (bound for key, bound in checks)))
+            checks = [checks[first] for first in firsts]
+        if workers is not None:
+            for index, value in self._imap_lower(
+                [key for key, bound in checks], algorithm, workers):
+                if self.number_cmp(value, checks[index][1]) == 1:
+                    return False
+            return True
+        for (gamble, event), bound in checks:
+            if self.number_cmp(
+                self.get_lower(gamble, event, algorithm), bound) == 1:
                 return False
         return True
 
@@ -793,6 +1319,133 @@ class LowPoly(LowPrev):
                 return False
         return True
 
+    def get_symmetry(self):
+        """Find the blocks of exchangeable elements, as specified by
+        :attr:`symmetry`. Two elements are exchangeable if swapping
+        them in every assessment gives back the same assessments. The
+        assessments, and therefore also the natural extension, are
+        then invariant under all permutations within blocks.
+
+        :return: The blocks with at least two elements.
+        :rtype: :class:`list` of :class:`~improb.Event`
+
+        >>> lprob = {'a': '0.1', 'b': '0.1', 'c': '0.2', 'd': '0.2', 'ab': '0.3'}
+        >>> lpr = LowPoly(pspace='abcd', lprob=lprob)
+        >>> lpr.get_symmetry()
+        []
+        >>> lpr.symmetry = True
+        >>> [list(block) for block in lpr.get_symmetry()]
+        [['a', 'b'], ['c', 'd']]
+        >>> lpr.is_coherent()
+        True
+        >>> print(lpr.get_lower({'a': 1, 'b': 2, 'c': 3, 'd': 4}))
+        21/10
+        >>> print(lpr.get_lower({'a': 2, 'b': 1, 'c': 4, 'd': 3}))
+        21/10
+        >>> lpr.symmetry = ['abc']
+        >>> [list(block) for block in lpr.get_symmetry()]
+        [['a', 'b']]
+        >>> lpr.symmetry.append('cd')
+        >>> [list(block) for block in lpr.get_symmetry()]
+        [['a', 'b'], ['c', 'd']]
+        >>> lprob['ac'] = '0.4'
+        >>> lpr = LowPoly(pspace='abcd', lprob=lprob)
+        >>> lpr.symmetry = True
+        >>> lpr.get_symmetry()
+        []
+        """
+        return [Event.from_mask(self.pspace,
+                                sum(1 << position for position in block))
+                for block in self._get_symmetry_blocks()]
+
+    def _get_symmetry_blocks(self):
+        """Helper function for :meth:`get_symmetry`, returning the
+        blocks as sorted lists of positions.
+        """
+        # implementation detail: this is cached in _symmetry_blocks,
+        # along with a frozen copy of the symmetry attribute it was
+        # calculated for (so changing the attribute in place is noticed)
+        if self.symmetry in (None, False, True):
+            symmetry = self.symmetry
+        else:
+            symmetry = tuple(tuple(block) for block in self.symmetry)
+        try:
+            cached_symmetry, blocks = self._symmetry_blocks
+        except AttributeError:
+            pass
+        else:
+            if cached_symmetry == symmetry:
+                return blocks
+        if not symmetry:
+            candidates = []
+        elif symmetry is True:
+            candidates = [range(len(self.pspace))]
+        else:
+            index = self.pspace.index
+            candidates = [
+                sorted(index(omega) for omega in self.pspace.make_event(block))
+                for block in symmetry]
+        assessments = dict(
+            ((event.mask, tuple(gamble.itervalues())), value)
+            for (gamble, event), value in self.iteritems())
+
+        def is_exchangeable(i, j):
+            both = (1 << i) | (1 << j)
+            for (mask, values), value in assessments.iteritems():
+                if mask & both and mask & both != both:
+                    mask ^= both
+                values = list(values)
+                values[i], values[j] = values[j], values[i]
+                if assessments.get((mask, tuple(values))) != value:
+                    return False
+            return True
+
+        # join exchangeable pairs, skipping pairs which are already
+        # in the same block (by transitivity, they are exchangeable)
+        parents = range(len(self.pspace))
+
+        def find(i):
+            while parents[i] != i:
+                i = parents[i]
+            return i
+
+        for candidate in candidates:
+            for i, j in itertools.combinations(candidate, 2):
+                root_i, root_j = find(i), find(j)
+                if root_i != root_j and is_exchangeable(i, j):
+                    parents[max(root_i, root_j)] = min(root_i, root_j)
+        blocks = collections.defaultdict(list)
+        for i in xrange(len(self.pspace)):
+            blocks[find(i)].append(i)
+        blocks = [block for root, block in sorted(blocks.iteritems())
+                  if len(block) > 1]
+        self._symmetry_blocks = symmetry, blocks
+        return blocks
+
+    def _get_orbit_keys(self, keys):
+        """Helper function to find, for every gamble/event pair in
+        *keys*, a canonical form of its orbit under permutations
+        within the blocks of :meth:`get_symmetry`: the pairs of event
+        membership and gamble value are sorted within every block.
+
+        :return: The canonical forms, or :const:`None` if there is no
+            symmetry.
+        :rtype: :class:`list` of :class:`tuple`
+        """
+        blocks = self._get_symmetry_blocks()
+        if not blocks:
+            return None
+        orbit_keys = []
+        for gamble, event in keys:
+            mask = self.pspace.make_event(event).mask
+            pairs = [(bool(mask >> i & 1), value) for i, value
+                     in enumerate(self.make_gamble(gamble).itervalues())]
+            for block in blocks:
+                for i, pair in zip(block, sorted(pairs[i] for i in block)):
+                    pairs[i] = pair
+            orbit_keys.append(tuple(pairs))
+        return orbit_keys
+
     def get_extend_domain(self):
         raise ValueError(
             'cannot extend to full domain: specify keys')
@@ -918,3 +1571,48 @@ class LowPoly(LowPrev):
     #    """Disjunction (unanimity rule). Result is not necessarily
     #    coherent."""
     #    raise NotImplementedError
+
+def _solve_linprogs(task):
+    """Solve a chunk of linear programs which only differ in their
+    objective function. This is a module level function so it can be
+    sent to worker processes, see :meth:`LowPoly._imap_lower`.
+
+    :return: The index and optimal value of each linear program.
+    :rtype: :class:`list` of :class:`tuple`
+    """
+    number_type, solver, rows, lin_set, col_size, indices, obj_funcs = task
+    matrix = improb.linprog.make_matrix(rows, col_size, lin_set, number_type)
+    matrix.obj_type = cdd.LPObjType.MIN
+    solver = improb.linprog.make_solver(solver, number_type)
+    results = []
+    for index, obj_func in itertools.izip(indices, obj_funcs):
+        matrix.obj_func = improb.linprog.make_dense_row(obj_func, col_size)
+        linprog = solver.solve(matrix)
+        if linprog.status != cdd.LPStatusType.OPTIMAL:
+            raise RuntimeError(
+                "BUG: unexpected status (%i)\n"
+                "matrix:\n%s\n"
+                % (linprog.status, matrix))
+        results.append((index, linprog.obj_value))
+    return results
+
+def _get_first_indices(labels):
+    """Find the first occurrence of every distinct label.
+
+    :return: The positions of the first occurrences, and for every
+        label the index of its first occurrence in that list.
+    :rtype: :class:`tuple` of two :class:`list`\ s
+
+    >>> _get_first_indices(['x', 'y', 'x', 'z', 'y'])
+    ([0, 1, 3], [0, 1, 0, 2, 1])
+    """
+    firsts = []
+    indices = []
+    positions = {}
+    for position, label in enumerate(labels):
+        index = positions.get(label)
+        if index is None:
+            index = positions[label] = len(firsts)
+            firsts.append(position)
+        indices.append(index)
+    return firsts, indices
@@ -20,15 +20,22 @@
 from __future__ import division, absolute_import, print_function
 
 import cdd
-import collections
 from fractions import Fraction
 from itertools import chain, izip
+import operator
 from operator import itemgetter
 import random
-
-from improb import PSpace, Gamble, Event
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from improb import PSpace, Gamble, Event, _choose
+import improb.linprog
+import improb.symmetry
+from improb.scaled import ScaledTuple
 from improb.lowprev.lowpoly import LowPoly
-from improb.setfunction import SetFunction
+from improb.setfunction import SetFunction, _get_monotonicities
 
 class LowProb(LowPoly):
     """An unconditional lower probability. This class is identical to
@@ -207,20 +214,139 @@ class LowProb(LowPoly):
         """Constructs basic belief assignment corresponding to the
         assigned unconditional lower probabilities.
         """
-        # construct set function corresponding to this lower probability
-        return SetFunction(
-            pspace=self.pspace,
-            data=dict((event, self.set_function.get_mobius(event))
-                      for event in self.pspace.subsets()),
-            number_type=self.number_type)
+        return self.set_function.get_mobius_transform()
 
     def get_extend_domain(self):
         return ((event, True) for event in self.pspace.subsets())
 
     # lowprobs have no upper, so default to upper=False
-    def extend(self, keys=None, lower=True, upper=False, algorithm='linprog'):
+    def extend(self, keys=None, lower=True, upper=False, algorithm=None):
+        """Calculate coherent extension to the given keys, see
+        :meth:`~improb.lowprev.lowpoly.LowPoly.extend`.
+
+        When extending to the full domain (*keys* is :const:`None`),
+        the ``'vertices'`` algorithm finds the lower probability of
+        all events at once, as the minimum over the extreme points of
+        the credal set of their summed mass on each event. The default
+        algorithm uses this unless the number of extreme points might
+        be too large (see :meth:`get_max_num_vertices`), and solves a
+        linear program for each key otherwise.
+
+        >>> lpr = LowProb(3, lprob={(0, 1): '0.1', (1, 2): '0.2', (2,): '0.05'})
+        >>> lpr2 = LowProb(3, lprob={(0, 1): '0.1', (1, 2): '0.2', (2,): '0.05'})
+        >>> lpr.extend(algorithm='vertices')
+        >>> lpr2.extend(algorithm='linprog')
+        >>> dict(lpr.iteritems()) == dict(lpr2.iteritems())
+        True
+
+        With :attr:`~improb.lowprev.lowpoly.LowPoly.symmetry`, only
+        one linear program is solved for each orbit of events.
+
+        >>> lpr = LowProb(4, lprob=['0.1', '0.1', '0.1', '0.2'])
+        >>> lpr2 = LowProb(4, lprob=['0.1', '0.1', '0.1', '0.2'])
+        >>> lpr2.symmetry = True
+        >>> [list(block) for block in lpr2.get_symmetry()]
+        [[0, 1, 2]]
+        >>> lpr.extend(algorithm='linprog')
+        >>> lpr2.extend(algorithm='linprog')
+        >>> dict(lpr.iteritems()) == dict(lpr2.iteritems())
+        True
+        """
+        if keys is None and algorithm in (None, 'vertices'):
+            # number of linear programs, one for each orbit of events
+            num_linprogs = 2 ** len(self.pspace)
+            for block in self._get_symmetry_blocks():
+                num_linprogs //= 2 ** len(block)
+                num_linprogs *= len(block) + 1
+            if (algorithm == 'vertices'
+                or self.get_max_num_vertices()
+                <= self.max_vertices_extend_factor
+                * len(self.pspace) * num_linprogs):
+                self._extend_vertices(lower, upper)
+                return
+        if algorithm is None:
+            algorithm = 'linprog'
         LowPoly.extend(self, keys, lower, upper, algorithm)
 
+    #: The default algorithm in :meth:`extend` enumerates extreme
+    #: points if their number is bounded by this factor, times the
+    #: number of linear programs which would be solved otherwise.
+    max_vertices_extend_factor = 1
+
+    def get_max_num_vertices(self):
+        """An upper bound for the number of extreme points of the
+        credal set. This is the smallest of :math:`n!` where :math:`n`
+        is the size of the possibility space (Wallner, 2007), and the
+        upper bound theorem (McMullen, 1970) for a polytope of
+        dimension :math:`n-1` with one facet for each non-trivial
+        constraint.
+
+        >>> LowProb(3, lprob={(0, 1): '0.1'}).get_max_num_vertices()
+        4
+        >>> LowProb(4).get_max_num_vertices()
+        4
+        """
+        dim = len(self.pspace) - 1
+        num_facets = len(self.pspace) + sum(
+            1 for (gamble, event), (lprev, uprev) in self.iteritems()
+            if lprev is not None)
+        if num_facets <= dim + 1:
+            # at most a simplex
+            return num_facets
+        bound = (
+            _choose(num_facets - (dim + 1) // 2, num_facets - dim)
+            + _choose(num_facets - (dim + 2) // 2, num_facets - dim))
+        factorial = 1
+        for i in xrange(2, len(self.pspace) + 1):
+            factorial *= i
+        return min(bound, factorial)
+
+    def _extend_vertices(self, lower=True, upper=False):
+        """Helper function for :meth:`extend`, extending to the full
+        domain by means of the extreme points of the credal set.
+        """
+        if not self.is_avoiding_sure_loss():
+            raise ValueError(
+                "lower prevision incurs sure loss:\n{0}".format(self))
+        vertices, array = self._get_vertices(self.pspace.make_event(True))
+        # mass of every event for every extreme point, indexed by
+        # event mask, and its minimum over all extreme points
+        if array is not None:
+            sums = numpy.zeros((len(vertices), 1 << len(self.pspace)))
+            for i in xrange(len(self.pspace)):
+                sums[:, 1 << i:2 << i] = sums[:, :1 << i] + array[:, i:i + 1]
+            lprobs = sums.min(axis=0).tolist()
+        else:
+            # for fractions, work with integers over a common denominator
+            if self.number_type == 'fraction':
+                scaled = ScaledTuple.from_values(chain.from_iterable(vertices))
+                numerators = scaled.numerators
+                size = len(self.pspace)
+                vertices = [numerators[i:i + size]
+                            for i in xrange(0, len(numerators), size)]
+            lprobs = None
+            for vertex in vertices:
+                sums = [0]
+                for prob in vertex:
+                    sums.extend([value + prob for value in sums])
+                lprobs = (sums if lprobs is None
+                          else [min(value, lprob)
+                                for value, lprob in izip(sums, lprobs)])
+            if self.number_type == 'fraction':
+                lprobs = ScaledTuple(lprobs, scaled.denominator)
+        full_mask = (1 << len(self.pspace)) - 1
+        for event, cond_event in list(self.get_extend_domain()):
+            event = self.pspace.make_event(event)
+            try:
+                lprev, uprev = self[event, cond_event]
+            except KeyError:
+                lprev, uprev = None, None
+            if lower:
+                lprev = self.make_number(lprobs[event.mask])
+            if upper:
+                uprev = 1 - self.make_number(lprobs[full_mask ^ event.mask])
+            self[event, cond_event] = lprev, uprev
+
     def is_completely_monotone(self):
         """Checks whether the lower probability is completely monotone
         or not.
@@ -347,20 +473,62 @@ class LowProb(LowPoly):
             efficient to call
             :meth:`~improb.setfunction.SetFunction.is_bba_n_monotone`
             on :attr:`~improb.lowprev.lowprob.LowProb.mobius`.
+
+        The constraints are evaluated as a product of the sparse
+        constraint matrix (see :meth:`get_sparse_matrix_n_monotone`)
+        and the vector of lower probabilities, indexed by event mask.
+        For the float number type, this uses numpy if it is
+        installed; for the fraction number type, all arithmetic is
+        done on integers.
+
+        >>> lpr = LowProb(pspace=12, lprob=dict(
+        ...     (event, '{0}/144'.format(len(event) ** 2))
+        ...     for event in PSpace(12).subsets()), number_type='fraction')
+        >>> lpr.is_n_monotone(2), lpr.is_n_monotone(3)
+        (True, True)
+        >>> lpr = LowProb(pspace=12, lprob=dict(
+        ...     (event, (len(event) / 12) ** 0.5)
+        ...     for event in PSpace(12).subsets()), number_type='float')
+        >>> lpr.is_n_monotone(1), lpr.is_n_monotone(2)
+        (True, False)
         """
+        pspace = self.pspace
         # check 0-monotonicity
         if monotonicity == 0:
-            if self.number_cmp(self[False, True]) != 0:
+            if self.number_cmp(self[False, True][0]) != 0:
                 return False
-            if self.number_cmp(self[True, True], 1) != 0:
+            if self.number_cmp(self[True, True][0], 1) != 0:
                 return False
-        # iterate over all constraints
-        for constraint in self.get_constraints_n_monotone(
-            self.pspace, monotonicity):
+        # lower probabilities, indexed by event mask
+        values = [self[Event.from_mask(pspace, mask), True][0]
+                  for mask in xrange(1 << len(pspace))]
+        if self.number_type == 'fraction':
+            # the common denominator is positive, so the numerators
+            # determine the signs
+            values = ScaledTuple.from_values(values).numerators
+        if numpy is not None and (
+            self.number_type == 'float'
+            # integers must be small enough to avoid overflow
+            or max(abs(value) for value in values) < 2 ** (62 - len(pspace))):
+            rows, cols, coeffs = self.get_sparse_matrix_n_monotone(
+                pspace, monotonicity)
+            if not len(rows):
+                return True
+            if self.number_type == 'float':
+                sums = numpy.bincount(
+                    rows,
+                    weights=coeffs * numpy.array(values, dtype=float)[cols])
+                return self.number_cmp(float(sums.min())) >= 0
+            # bincount only sums floats; rows are contiguous, so sum
+            # every run of equal row indices instead
+            terms = coeffs * numpy.array(values, dtype=numpy.int64)[cols]
+            starts = numpy.flatnonzero(numpy.r_[True, rows[1:] != rows[:-1]])
+            return bool(numpy.add.reduceat(terms, starts).min() >= 0)
+        for constraint in self._get_sparse_constraints_n_monotone(
+            pspace, monotonicity):
             # check the constraint
             if self.number_cmp(
-                sum(coeff * self[event, True][0]
-                    for event, coeff in constraint)) < 0:
+                sum(coeff * values[mask] for mask, coeff in constraint)) < 0:
                 return False
         return True
 
@@ -411,10 +579,20 @@ class LowProb(LowPoly):
             \sum_{B\colon C\cup D\subseteq B\subseteq A}(-1)^{|B\setminus D|}
             \underline{P}(D)\ge 0
 
+        The inner sum over :math:`B` is zero unless :math:`C\cup D=A`,
+        in which case it is :math:`(-1)^{|C\setminus D|}`. So, the
+        constraint becomes
+
+        .. math::
+
+            \sum_{G\colon G\subseteq C}(-1)^{|C\setminus G|}
+            \underline{P}((A\setminus C)\cup G)\ge 0
+
         This implementation iterates over all :math:`C\subseteq
         A\subseteq\Omega`, with :math:`|C|=n`, and yields each
         constraint as an iterable of (event, coefficient) pairs, where
-        zero coefficients are omitted.
+        zero coefficients are omitted, so every constraint has
+        :math:`2^n` terms.
 
         .. note::
 
@@ -477,41 +655,108 @@ class LowProb(LowPoly):
         -1  1   1   1   -1  -1  -1  1  
         """
         pspace = PSpace.make(pspace)
-        # check type
-        if monotonicity is None:
-            raise ValueError("specify monotonicity")
-        elif isinstance(monotonicity, collections.Iterable):
-            # special case: return it for all values in the iterable
-            for mono in monotonicity:
-                for constraint in cls.get_constraints_n_monotone(pspace, mono):
-                    yield constraint
-            return
-        elif not isinstance(monotonicity, (int, long)):
-            raise TypeError("monotonicity must be integer")
-        # check value
-        if monotonicity < 0:
-            raise ValueError("specify a non-negative monotonicity")
-        if monotonicity == 0:
-            # don't return constraints in this case
-            return
-        # yield all constraints
-        for event_a in pspace.subsets(size=xrange(monotonicity, len(pspace) + 1)):
-            for subevent_c in pspace.subsets(event_a, size=monotonicity):
-                yield (
-                    (subevent_d,
-                     sum((-1) ** len(event_b - subevent_d)
-                         for event_b in pspace.subsets(
-                             event_a, contains=(subevent_d | subevent_c))))
-                    for subevent_d in pspace.subsets(event_a))
+        for constraint in cls._get_sparse_constraints_n_monotone(
+            pspace, monotonicity):
+            yield ((Event.from_mask(pspace, mask), coeff)
+                   for mask, coeff in constraint)
 
     @classmethod
-    def make_extreme_n_monotone(cls, pspace, monotonicity=None):
-        """Yield extreme lower probabilities with given monotonicity.
+    def _get_sparse_constraints_n_monotone(cls, pspace, monotonicity):
+        """Helper function for :meth:`get_constraints_n_monotone`:
+        yields each constraint as a list of (event mask, coefficient)
+        pairs.
+        """
+        for mono in _get_monotonicities(monotonicity):
+            for mask_a in pspace.subset_masks(
+                size=xrange(mono, len(pspace) + 1)):
+                event_a = Event.from_mask(pspace, mask_a)
+                for mask_c in pspace.subset_masks(event_a, size=mono):
+                    rest = mask_a & ~mask_c
+                    yield [
+                        (rest | mask_g,
+                         -1 if (mono - bin(mask_g).count('1')) & 1 else 1)
+                        for mask_g in pspace.subset_masks(
+                            Event.from_mask(pspace, mask_c))]
 
-        .. warning::
+    @classmethod
+    def get_sparse_matrix_n_monotone(cls, pspace, monotonicity=None):
+        """The constraints of :meth:`get_constraints_n_monotone` as a
+        sparse integer matrix in coordinate format, with one row per
+        constraint, and one column per event, indexed by event mask
+        (see :attr:`improb.Event.mask`). This requires numpy.
 
-           Currently this doesn't work very well except for the cases
-           below.
+        :param pspace: The possibility space.
+        :type pspace: |pspacetype|
+        :param monotonicity: Requested level of monotonicity.
+        :type monotonicity: :class:`int` or
+            :class:`collections.Iterable` of :class:`int`
+        :return: The row indices, column indices, and coefficients
+            of the non-zero entries.
+        :rtype: :class:`tuple` of three :class:`numpy.ndarray`
+
+        >>> rows, cols, coeffs = LowProb.get_sparse_matrix_n_monotone('abc', 2)
+        >>> print(rows.max() + 1, len(coeffs))
+        6 24
+        >>> constraints = sorted(
+        ...     sorted((col, coeff) for row, col, coeff in zip(rows, cols, coeffs)
+        ...            if row == i)
+        ...     for i in xrange(6))
+        >>> constraints == sorted(
+        ...     sorted((event.mask, coeff) for event, coeff in constraint)
+        ...     for constraint in LowProb.get_constraints_n_monotone('abc', 2))
+        True
+        """
+        if numpy is None:
+            raise ImportError("get_sparse_matrix_n_monotone requires numpy")
+        pspace = PSpace.make(pspace)
+        size = len(pspace)
+        masks = numpy.arange(1 << size, dtype=numpy.int64)
+        popcounts = numpy.zeros(1 << size, dtype=numpy.int64)
+        for i in xrange(size):
+            popcounts += (masks >> i) & 1
+        all_rows = []
+        all_cols = []
+        all_coeffs = []
+        num_rows = 0
+        for mono in _get_monotonicities(monotonicity):
+            for mask_c in pspace.subset_masks(size=mono):
+                # A \ C runs over all events disjoint from C, and G
+                # over all subsets of C
+                rests = masks[(masks & mask_c) == 0]
+                subs = masks[(masks & ~mask_c) == 0]
+                signs = numpy.where((mono - popcounts[subs]) & 1, -1, 1)
+                all_rows.append(numpy.repeat(
+                    numpy.arange(num_rows, num_rows + len(rests)), len(subs)))
+                all_cols.append((rests[:, numpy.newaxis] | subs).ravel())
+                all_coeffs.append(numpy.tile(signs, len(rests)))
+                num_rows += len(rests)
+        if not all_rows:
+            empty = numpy.zeros(0, dtype=numpy.int64)
+            return empty, empty, empty
+        return (numpy.concatenate(all_rows), numpy.concatenate(all_cols),
+                numpy.concatenate(all_coeffs))
+
+    @classmethod
+    def make_extreme_n_monotone(cls, pspace, monotonicity=None,
+                                algorithm=None, expand=True):
+        """Yield extreme lower probabilities with given monotonicity.
+
+        :param pspace: The possibility space.
+        :type pspace: |pspacetype|
+        :param monotonicity: Requested level of monotonicity.
+        :type monotonicity: :class:`int`
+        :param algorithm: Either ``None`` or ``'cdd'`` to enumerate all
+            extreme points at once with cddlib, or ``'orbits'`` to
+            enumerate them modulo permutations of the possibility
+            space; see :func:`improb.symmetry.get_vertices`.
+        :type algorithm: :class:`str`
+        :param expand: For the ``'orbits'`` algorithm, whether to
+            yield all extreme points, or only one per orbit.
+        :type expand: :class:`bool`
+
+        The constraints are invariant under permutations of the
+        possibility space, which is exploited to remove redundant
+        constraints before enumeration.
 
         >>> lprs = list(LowProb.make_extreme_n_monotone('abc', monotonicity=2))
         >>> len(lprs)
@@ -564,41 +809,49 @@ class LowProb(LowPoly):
         True
         >>> all(lpr.is_n_monotone(4) for lpr in lprs)
         True
-        >>> # cddlib hangs on larger possibility spaces
-        >>> #lprs = list(LowProb.make_extreme_n_monotone('abcde', monotonicity=2))
+        >>> lprs = list(LowProb.make_extreme_n_monotone(
+        ...     'abcd', monotonicity=2, algorithm='orbits'))
+        >>> len(lprs)
+        41
+        >>> lprs = list(LowProb.make_extreme_n_monotone(
+        ...     'abcde', monotonicity=4, algorithm='orbits', expand=False))
+        >>> len(lprs)
+        6
+        >>> all(lpr.is_n_monotone(4) for lpr in lprs)
+        True
+        >>> all(lpr.is_n_monotone(5) for lpr in lprs)
+        False
         """
         pspace = PSpace.make(pspace)
+        # column of every event
+        masks = list(pspace.subset_masks())
+        ranks = dict((mask, rank) for rank, mask in enumerate(masks))
+        full_mask = (1 << len(pspace)) - 1
         # constraint for empty set and full set
         matrix = cdd.Matrix(
-            [[0] + [1 if event.is_false() else 0 for event in pspace.subsets()],
-             [-1] + [1 if event.is_true() else 0 for event in pspace.subsets()]],
+            [[0] + [1 if mask == 0 else 0 for mask in masks],
+             [-1] + [1 if mask == full_mask else 0 for mask in masks]],
             linear=True,
             number_type='fraction')
         # constraints for monotonicity
-        constraints = [
-            dict(constraint) for constraint in
-            cls.get_constraints_n_monotone(pspace, xrange(1, monotonicity + 1))]
-        matrix.extend([[0] + [constraint.get(event, 0)
-                              for event in pspace.subsets()]
-                       for constraint in constraints])
+        rows = []
+        for constraint in cls.get_constraints_n_monotone(
+            pspace, xrange(1, monotonicity + 1)):
+            row = [0] * (len(masks) + 1)
+            for event, value in constraint:
+                row[1 + ranks[event.mask]] = value
+            rows.append(row)
+        matrix.extend(rows)
         matrix.rep_type = cdd.RepType.INEQUALITY
-
-        # debug: simplify matrix
-        #print(pspace, monotonicity) # debug
-        #print("original:", len(matrix))
-        #matrix.canonicalize()
-        #print("new     :", len(matrix))
-        #print(matrix) # debug
-
-        # calculate extreme points
-        poly = cdd.Polyhedron(matrix)
-        # convert these points back to lower probabilities
-        #print(poly.get_generators()) # debug
-        for vert in poly.get_generators():
+        # calculate extreme points, and convert them back to lower
+        # probabilities
+        for vert in improb.symmetry.get_vertices(
+            matrix, improb.symmetry.get_mask_permutations(pspace, masks),
+            algorithm=algorithm, expand=expand):
             yield cls(
                 pspace=pspace,
-                lprob=dict((event, vert[1 + index])
-                           for index, event in enumerate(pspace.subsets())),
+                lprob=dict((Event.from_mask(pspace, mask), vert[rank])
+                           for rank, mask in enumerate(masks)),
                 number_type='fraction')
 
     # TODO move to LowPoly
@@ -624,12 +877,30 @@ class LowProb(LowPoly):
             a b c : -1/4
         """
         other = self.make_number(other)
+        gambles, lprevs = self._get_gambles_lprevs()
+        if self.number_type == 'fraction':
+            lprevs = oper(lprevs, other)
+        else:
+            lprevs = [oper(lprev, other) for lprev in lprevs]
         return LowProb(self.pspace,
-                       lprev=dict([(gamble, oper(lprev, other))
-                                   for (gamble, event), (lprev, uprev)
-                                   in self.iteritems()]),
+                       lprev=dict(izip(gambles, lprevs)),
                        number_type=self.number_type)
 
+    def _get_gambles_lprevs(self):
+        """Helper function for :meth:`_scalar` and :meth:`_pointwise`:
+        returns the gambles, and their lower probabilities (as a
+        :class:`~improb.scaled.ScaledTuple` for the fraction number
+        type, so arithmetic is done on integers).
+        """
+        gambles = []
+        lprevs = []
+        for (gamble, event), (lprev, uprev) in self.iteritems():
+            gambles.append(gamble)
+            lprevs.append(lprev)
+        if self.number_type == 'fraction':
+            lprevs = ScaledTuple.from_values(lprevs)
+        return gambles, lprevs
+
     # TODO move to LowPoly
     def _pointwise(self, other, oper):
         """
@@ -671,21 +942,25 @@ class LowProb(LowPoly):
                 raise ValueError("domain mismatch")
             if self.number_type != other.number_type:
                 raise ValueError("number type mismatch")
+            gambles, lprevs = self._get_gambles_lprevs()
+            other_lprevs = [other[gamble, True][0] for gamble in gambles]
+            if self.number_type == 'fraction':
+                lprevs = oper(lprevs, ScaledTuple.from_values(other_lprevs))
+            else:
+                lprevs = [oper(lprev, other_lprev) for lprev, other_lprev
+                          in izip(lprevs, other_lprevs)]
             return LowProb(self.pspace,
-                           lprev=dict([(gamble,
-                                        oper(lprev, other[gamble, True][0]))
-                                       for (gamble, event), (lprev, uprev)
-                                       in self.iteritems()]),
+                           lprev=dict(izip(gambles, lprevs)),
                            number_type=self.number_type)
         else:
             # will raise a type error if operand is not scalar
             return self._scalar(other, oper)
 
     # TODO move to LowPoly
-    __add__ = lambda self, other: self._pointwise(other, self.NumberType.__add__)
-    __sub__ = lambda self, other: self._pointwise(other, self.NumberType.__sub__)
-    __mul__ = lambda self, other: self._pointwise(other, self.NumberType.__mul__)
-    __truediv__ = lambda self, other: self._scalar(other, self.NumberType.__truediv__)
+    __add__ = lambda self, other: self._pointwise(other, operator.add)
+    __sub__ = lambda self, other: self._pointwise(other, operator.sub)
+    __mul__ = lambda self, other: self._pointwise(other, operator.mul)
+    __truediv__ = lambda self, other: self._scalar(other, operator.truediv)
 
     __neg__ = lambda self: self * (-1)
 
@@ -992,14 +1267,14 @@ class LowProb(LowPoly):
               B C   : 0.019342004097
               B   D : 0.0575230107598
                 C D : 0.0259349851432
-            A B C   : 3.33066907388e-16
-            A B   D : -1.11022302463e-16
-            A   C D : -1.11022302463e-16
+            A B C   : -8.32667268469e-17
+            A B   D : 2.77555756156e-17
+            A   C D : -2.77555756156e-17
               B C D : 0.0
             A B C D : 0.0357768453276
             >>> sum(lprev for (lprev, uprev)
             ...           in (lprob - belfunc).itervalues())/(2 ** len(pspace))
-            0.013595658498933991
+            0.013595658498933988
 
             .. note::
 
@@ -1096,14 +1371,14 @@ class LowProb(LowPoly):
               B C   : 0.0216487166733
               B   D : 0.0598197271
                 C D : 0.0212949267869
-            A B C   : 2.22044604925e-16
+            A B C   : 2.77555756156e-17
             A B   D : 0.0109955450242
             A   C D : 0.00368317620293
               B C D : 3.66294398528e-05
             A B C D : 0.00879232466651
             >>> sum(lprev for (lprev, uprev)
             ...           in (lprob - belfunc).itervalues())/(2 ** len(pspace))
-            0.010375479708342836
+            0.01037547970834284
 
             .. note::
 
@@ -1218,15 +1493,15 @@ class LowProb(LowPoly):
               B     : 0.2743
                 C   : 0.2668
                   D : 0.1063
-            A B     : 0.0
+            A B     : 1.38777878078e-17
             A   C   : 0.0516
             A     D : 0.09255
               B C   : 0.0426
               B   D : 0.05975
                 C D : 0.00045
-            A B C   : 0.0
-            A B   D : 1.11022302463e-16
-            A   C D : 0.0
+            A B C   : -1.38777878078e-17
+            A B   D : -1.38777878078e-17
+            A   C D : -1.38777878078e-17
               B C D : 0.0
             A B C D : 0.01615
             >>> sum(lprev for (lprev, uprev)
@@ -1285,8 +1560,7 @@ class LowProb(LowPoly):
                             bba[subevent] = (bba[subevent]
                                              * (1 + (bba[event] / mass)))
                         bba[event] = 0
-            return LowProb(pspace, lprob=dict((event, bba.get_zeta(event)) 
-                                              for event in bba.iterkeys()))
+            return LowProb(pspace, lprob=bba.get_zeta_transform())
         elif algorithm == 'imrm':
             # Initialize the algorithm
             pspace = self.pspace
@@ -1332,8 +1606,7 @@ class LowProb(LowPoly):
                     for event, value in temp_bba.iteritems():
                         bba[event] = value
                     cardinality = minindex + 1
-            return LowProb(pspace, lprob=dict((event, bba.get_zeta(event))
-                                              for event in bba.iterkeys()))
+            return LowProb(pspace, lprob=bba.get_zeta_transform())
         elif algorithm == 'lpbelfunc':
             # Initialize the algorithm
             lprob = self.set_function
@@ -1353,16 +1626,14 @@ class LowProb(LowPoly):
             mat.obj_type = cdd.LPObjType.MAX
             mat.obj_func = (0,) + tuple(2 ** (len(pspace) - len(event))
                                         for event in pspace.subsets())
-            lp = cdd.LinProg(mat)
             # Solve the linear program and check the solution
-            lp.solve()
+            lp = improb.linprog.solve(mat, self.solver)
             if lp.status == cdd.LPStatusType.OPTIMAL:
                 bba = SetFunction(pspace,
                                   data=dict(izip(list(pspace.subsets()),
                                                  list(lp.primal_solution))),
                                   number_type=number_type)
-                return LowProb(pspace, lprob=dict((event, bba.get_zeta(event))
-                                                  for event in bba.iterkeys()))
+                return LowProb(pspace, lprob=bba.get_zeta_transform())
             else:
                 raise RuntimeError('No optimal solution found.')
         else:
@@ -0,0 +1,271 @@
+# improb is a Python module for working with imprecise probabilities
+# Copyright (c) 2008-2011, Matthias Troffaes
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Exact arithmetic on sequences of rational numbers, stored as
+integers over a single shared denominator.
+
+Adding or multiplying two :class:`~fractions.Fraction` instances
+needs a greatest common divisor to normalize the result, so
+element-wise operations on sequences of fractions need one gcd per
+element. A :class:`ScaledTuple` instead stores integer numerators
+along with one common denominator, so element-wise operations are
+integer operations, followed by a single normalization of the whole
+sequence. If `gmpy2 <http://code.google.com/p/gmpy/>`_ is installed,
+then its integers are used for the numerators.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+import collections
+import fractions
+import numbers
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+if gmpy2 is not None:
+    mpz = gmpy2.mpz
+    _gcd = gmpy2.gcd
+else:
+    mpz = long
+    _gcd = fractions.gcd
+
+def _lcm(a, b):
+    """Least common multiple of two positive integers."""
+    return a // _gcd(a, b) * b
+
+def _as_ratio(value):
+    """Numerator and denominator of an integer or rational *value*."""
+    if isinstance(value, numbers.Integral):
+        return value, 1
+    elif isinstance(value, numbers.Rational):
+        return value.numerator, value.denominator
+    else:
+        raise TypeError(
+            "expected integer or rational number but got {0}"
+            .format(type(value).__name__))
+
+class ScaledTuple(collections.Sequence, collections.Hashable):
+    """An immutable sequence of rational numbers, stored as integer
+    numerators over a single positive denominator. The numerators and
+    the denominator have no common factor, so equal sequences have
+    equal representations. Elements are returned as
+    :class:`~fractions.Fraction` instances.
+
+    Arithmetic with another :class:`ScaledTuple` of the same length is
+    element-wise; arithmetic with an integer or rational number
+    applies to every element.
+
+    >>> values = ScaledTuple.from_values(
+    ...     [fractions.Fraction(1, 6), fractions.Fraction(-3, 4), 2])
+    >>> print(" ".join(str(value) for value in values))
+    1/6 -3/4 2
+    >>> print(values.denominator, [int(x) for x in values.numerators])
+    12 [2, -9, 24]
+    >>> print(" ".join(str(value) for value in values + values))
+    1/3 -3/2 4
+    >>> print(" ".join(str(value) for value in values * values))
+    1/36 9/16 4
+    >>> print(" ".join(str(value) for value in values - 1))
+    -5/6 -7/4 1
+    >>> print(" ".join(str(value) for value in values / fractions.Fraction(-1, 2)))
+    -1/3 3/2 -4
+    >>> print(values.minimum(), values.maximum())
+    -3/4 2
+    >>> (values - values) * 5 == ScaledTuple.from_values([0, 0, 0])
+    True
+    >>> values / 0
+    Traceback (most recent call last):
+        ...
+    ZeroDivisionError: division by zero
+    """
+
+    def __init__(self, numerators, denominator=1):
+        """Construct the sequence of rational numbers
+        ``numerator / denominator`` for all *numerators*.
+
+        :param numerators: The numerators.
+        :type numerators: sequence of integers
+        :param denominator: The common denominator.
+        :type denominator: non-zero integer
+        """
+        numerators = [mpz(numerator) for numerator in numerators]
+        denominator = mpz(denominator)
+        if not denominator:
+            raise ZeroDivisionError("division by zero")
+        if denominator < 0:
+            numerators = [-numerator for numerator in numerators]
+            denominator = -denominator
+        # normalize, stopping as soon as no common factor remains
+        divisor = denominator
+        for numerator in numerators:
+            if divisor == 1:
+                break
+            divisor = _gcd(divisor, abs(numerator))
+        if divisor != 1:
+            numerators = [numerator // divisor for numerator in numerators]
+            denominator //= divisor
+        self._numerators = tuple(numerators)
+        self._denominator = denominator
+
+    @classmethod
+    def _make(cls, numerators, denominator):
+        """Construct from numerators and a positive denominator which
+        are known to have no common factor.
+        """
+        result = cls.__new__(cls)
+        result._numerators = tuple(numerators)
+        result._denominator = denominator
+        return result
+
+    @classmethod
+    def from_values(cls, values):
+        """Construct from integers and rational numbers. The common
+        denominator is the least common multiple of the denominators,
+        so no further normalization is needed.
+
+        :param values: The values.
+        :type values: iterable of integers and rationals
+        :rtype: :class:`ScaledTuple`
+        """
+        if isinstance(values, ScaledTuple):
+            return values
+        ratios = [_as_ratio(value) for value in values]
+        denominator = mpz(1)
+        for numerator, value_denominator in ratios:
+            if value_denominator != 1:
+                denominator = _lcm(denominator, mpz(value_denominator))
+        return cls._make(
+            (mpz(numerator) * (denominator // value_denominator)
+             for numerator, value_denominator in ratios),
+            denominator)
+
+    @property
+    def numerators(self):
+        """The integer numerators, as a tuple."""
+        return self._numerators
+
+    @property
+    def denominator(self):
+        """The common denominator, a positive integer."""
+        return self._denominator
+
+    def __len__(self):
+        return len(self._numerators)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ScaledTuple(self._numerators[index], self._denominator)
+        return fractions.Fraction(
+            long(self._numerators[index]), long(self._denominator))
+
+    def __iter__(self):
+        denominator = long(self._denominator)
+        for numerator in self._numerators:
+            yield fractions.Fraction(long(numerator), denominator)
+
+    def __eq__(self, other):
+        if isinstance(other, ScaledTuple):
+            return (self._denominator == other._denominator
+                    and self._numerators == other._numerators)
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, ScaledTuple):
+            return not self == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return "ScaledTuple({0}, {1})".format(
+            [int(numerator) for numerator in self._numerators],
+            int(self._denominator))
+
+    def _rescaled(self, other):
+        """Numerators of *self* and *other* over their least common
+        denominator, along with that denominator.
+        """
+        if self._denominator == other._denominator:
+            return self._numerators, other._numerators, self._denominator
+        denominator = _lcm(self._denominator, other._denominator)
+        self_factor = denominator // self._denominator
+        other_factor = denominator // other._denominator
+        return (
+            [numerator * self_factor for numerator in self._numerators],
+            [numerator * other_factor for numerator in other._numerators],
+            denominator)
+
+    def _other(self, other):
+        """Turn *other* into a :class:`ScaledTuple` of the same length."""
+        if isinstance(other, ScaledTuple):
+            if len(other) != len(self):
+                raise ValueError("length mismatch")
+            return other
+        numerator, denominator = _as_ratio(other)
+        return ScaledTuple._make(
+            [mpz(numerator)] * len(self), mpz(denominator))
+
+    def __add__(self, other):
+        self_nums, other_nums, denominator = self._rescaled(self._other(other))
+        return ScaledTuple(
+            [x + y for x, y in zip(self_nums, other_nums)], denominator)
+
+    def __sub__(self, other):
+        self_nums, other_nums, denominator = self._rescaled(self._other(other))
+        return ScaledTuple(
+            [x - y for x, y in zip(self_nums, other_nums)], denominator)
+
+    def __mul__(self, other):
+        if isinstance(other, ScaledTuple):
+            other = self._other(other)
+            return ScaledTuple(
+                [x * y for x, y
+                 in zip(self._numerators, other._numerators)],
+                self._denominator * other._denominator)
+        numerator, denominator = _as_ratio(other)
+        return ScaledTuple(
+            [x * numerator for x in self._numerators],
+            self._denominator * denominator)
+
+    def __truediv__(self, other):
+        numerator, denominator = _as_ratio(other)
+        if not numerator:
+            raise ZeroDivisionError("division by zero")
+        return ScaledTuple(
+            [x * denominator for x in self._numerators],
+            self._denominator * numerator)
+
+    def __neg__(self):
+        return ScaledTuple._make(
+            [-x for x in self._numerators], self._denominator)
+
+    __radd__ = __add__
+    __rsub__ = lambda self, other: self.__sub__(other).__neg__()
+    __rmul__ = __mul__
+
+    def minimum(self):
+        """Find the minimum value."""
+        return fractions.Fraction(
+            long(min(self._numerators)), long(self._denominator))
+
+    def maximum(self):
+        """Find the maximum value."""
+        return fractions.Fraction(
+            long(max(self._numerators)), long(self._denominator))
@@ -23,8 +23,14 @@ import cdd
 import collections
 import itertools
 import operator
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 from improb import PSpace, Gamble, Event
+from improb.scaled import ScaledTuple
+import improb.symmetry
 
 class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
     """A real-valued set function defined on the power set of a
@@ -33,7 +39,7 @@ class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
     Bases: :class:`collections.MutableMapping`, :class:`cdd.NumberTypeable`
     """
 
-    def __init__(self, pspace, data=None, number_type=None):
+    def __init__(self, pspace, data=None, number_type=None, dense=False):
         """Construct a set function on the power set of the given
         possibility space.
 
@@ -41,6 +47,32 @@ class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
         :type pspace: |pspacetype|
         :param data: A mapping that defines the value on each event (missing values default to zero).
         :type data: :class:`dict`
+        :param dense: Whether to store the values in a flat array
+            indexed by event mask (see :meth:`as_array`), rather than
+            in a dictionary. This requires numpy.
+        :type dense: :class:`bool`
+
+        Dense storage takes a fixed amount of memory, namely one
+        number for each of the :math:`2^n` events, but avoids
+        constructing an :class:`~improb.Event` for each stored value:
+
+        >>> s = SetFunction(pspace='abc', data={'': 0, 'ab': 0.5, 'abc': 1}, dense=True)
+        >>> print(s)
+              : 0.0
+        a b   : 0.5
+        a b c : 1.0
+        >>> len(s)
+        3
+        >>> s['bc'] = 0.5
+        >>> del s['ab']
+        >>> print(s)
+              : 0.0
+          b c : 0.5
+        a b c : 1.0
+        >>> s['ab']
+        Traceback (most recent call last):
+            ...
+        KeyError: Event(pspace=PSpace(['a', 'b', 'c']), elements=set(['a', 'b']))
         """
         if number_type is None:
             if data is not None:
@@ -50,35 +82,147 @@ class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
                 number_type = 'float'
         cdd.NumberTypeable.__init__(self, number_type)
         self._pspace = PSpace.make(pspace)
-        self._data = {}
+        if dense:
+            if numpy is None:
+                raise ImportError("dense storage requires numpy")
+            self._data = None
+            self._array = self._make_array()
+        else:
+            self._data = {}
+            self._array = None
         if data is not None:
             for event, value in data.iteritems():
                 self[event] = value
 
+    def _make_array(self):
+        """Create an array for dense storage with all values
+        undefined. Undefined values are stored as NaN for the float
+        number type, and as :const:`None` for the fraction number type.
+        """
+        size = 1 << len(self._pspace)
+        if self.number_type == 'float':
+            array = numpy.empty(size, dtype=float)
+            array.fill(numpy.nan)
+            return array
+        else:
+            return numpy.empty(size, dtype=object)
+
+    def _get_defined(self):
+        """Boolean array, indexed by event mask, telling which values
+        are defined in dense storage.
+        """
+        if self.number_type == 'float':
+            return ~numpy.isnan(self._array)
+        else:
+            return numpy.array([value is not None for value in self._array],
+                               dtype=bool)
+
+    @property
+    def dense(self):
+        """Whether values are stored in a flat array; see :meth:`as_array`."""
+        return self._array is not None
+
+    def as_array(self):
+        """Return the values as a flat array of length :math:`2^n`,
+        where :math:`n` is the size of the possibility space. The value
+        of each event is stored at the index given by its
+        :attr:`~improb.Event.mask`. The array has dtype :class:`float`
+        for the float number type, and :class:`object` for the fraction
+        number type. Undefined values are NaN and :const:`None`,
+        respectively.
+
+        For dense storage, this is the storage array itself, so no
+        copying is involved (and modifying the array modifies the set
+        function). Otherwise, a new array is constructed.
+
+        >>> s = SetFunction(pspace='ab', data={'': 0, 'a': 0.25, 'ab': 1}, dense=True)
+        >>> list(s.as_array())
+        [0.0, 0.25, nan, 1.0]
+        >>> s.as_array() is s.as_array()
+        True
+        >>> s = SetFunction(pspace='ab', data={'': 0, 'a': '1/4', 'ab': 1}, number_type='fraction')
+        >>> list(s.as_array())
+        [Fraction(0, 1), Fraction(1, 4), None, Fraction(1, 1)]
+        """
+        if numpy is None:
+            raise ImportError("as_array requires numpy")
+        if self._array is not None:
+            return self._array
+        array = self._make_array()
+        for event, value in self._data.iteritems():
+            array[event.mask] = value
+        return array
+
     def __len__(self):
+        if self._array is not None:
+            return int(numpy.count_nonzero(self._get_defined()))
         return len(self._data)
 
     def __iter__(self):
         # iter(self._data) has no stable ordering
         # therefore use self.pspace.subsets() instead
+        if self._array is not None:
+            defined = self._get_defined()
+            for mask in self.pspace.subset_masks():
+                if defined[mask]:
+                    yield Event.from_mask(self.pspace, mask)
+            return
         for subset in self.pspace.subsets():
             if subset in self._data:
                 yield subset
 
     def __contains__(self, event):
-        return self.pspace.make_event(event) in self._data
+        event = self.pspace.make_event(event)
+        if self._array is not None:
+            return not self._is_undefined(self._array[event.mask])
+        return event in self._data
 
     def __getitem__(self, event):
         event = self.pspace.make_event(event)
+        if self._array is not None:
+            value = self._array[event.mask]
+            if self._is_undefined(value):
+                raise KeyError(event)
+            return float(value) if self.number_type == 'float' else value
         return self._data[event]
 
     def __setitem__(self, event, value):
+        """Set the value of an event. NaN cannot be assigned, as it
+        marks undefined values (see :meth:`as_array`).
+
+        >>> s = SetFunction(pspace='ab', data={'': 0, 'ab': 1}, dense=True)
+        >>> s['a'] = float('nan')
+        Traceback (most recent call last):
+            ...
+        ValueError: cannot assign NaN
+        >>> len(s), 'a' in s
+        (2, False)
+        """
         event = self.pspace.make_event(event)
         value = self.make_number(value)
-        self._data[event] = value
+        if self._is_undefined(value):
+            raise ValueError("cannot assign NaN")
+        if self._array is not None:
+            self._array[event.mask] = value
+        else:
+            self._data[event] = value
 
     def __delitem__(self, event):
-        del self._data[self.pspace.make_event(event)]
+        event = self.pspace.make_event(event)
+        if self._array is not None:
+            if self._is_undefined(self._array[event.mask]):
+                raise KeyError(event)
+            self._array[event.mask] = (
+                numpy.nan if self.number_type == 'float' else None)
+        else:
+            del self._data[event]
+
+    def _is_undefined(self, value):
+        """Does *value*, taken from dense storage, mark an undefined
+        value?
+        """
+        # NaN is the only float that is not equal to itself
+        return value is None or value != value
 
     def __repr__(self):
         """
@@ -159,9 +303,12 @@ class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
           b : 0.3
         a b : 0.45
         """
-        event = self.pspace.make_event(event)
-        return sum(((-1) ** len(event - subevent)) * self[subevent]
-                   for subevent in self.pspace.subsets(event))
+        pspace = self.pspace
+        event = pspace.make_event(event)
+        return sum(
+            (-1 if (len(event) - bin(mask).count('1')) & 1 else 1)
+            * self[Event.from_mask(pspace, mask)]
+            for mask in pspace.subset_masks(event))
 
     def get_zeta(self, event):
         """Calculate the value of the zeta transform (inverse Mobius
@@ -198,8 +345,136 @@ class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
           b : 0.3
         a b : 1.0
         """
-        event = self.pspace.make_event(event)
-        return sum(self[subevent] for subevent in self.pspace.subsets(event))
+        pspace = self.pspace
+        return sum(self[Event.from_mask(pspace, mask)]
+                   for mask in pspace.subset_masks(event))
+
+    def _get_subset_sums(self, sign):
+        """Helper function for :meth:`get_mobius_transform` and
+        :meth:`get_zeta_transform`: returns the sequence of values,
+        indexed by event mask, of
+
+        .. math::
+
+           \sum_{B\subseteq A}\sigma^{|A\setminus B|}s(B)
+
+        where :math:`\sigma` is *sign* (either ``1`` or ``-1``).
+
+        This uses the butterfly recurrence over the elements of the
+        possibility space: after processing element :math:`\omega`, the
+        value at :math:`A` sums over all :math:`B\subseteq A` that
+        agree with :math:`A` outside the elements processed so far. The
+        number of additions is therefore :math:`n2^n` rather than
+        :math:`3^n`. For the fraction number type, the additions are
+        done on integer numerators over a common denominator, and a
+        :class:`~improb.scaled.ScaledTuple` is returned.
+        """
+        pspace = self.pspace
+        size = 1 << len(pspace)
+        if self._array is not None:
+            defined = self._get_defined()
+            if not defined.all():
+                raise KeyError(Event.from_mask(
+                    pspace, int(numpy.flatnonzero(~defined)[0])))
+            values = self._array
+        else:
+            values = [self[Event.from_mask(pspace, mask)]
+                      for mask in xrange(size)]
+        if self.number_type == 'float' and numpy is not None:
+            array = numpy.array(values, dtype=float)
+            _add_subsets(array, sign)
+            return array
+        if self.number_type == 'fraction':
+            scaled = ScaledTuple.from_values(values)
+            values = list(scaled.numerators)
+        else:
+            values = list(values)
+        _add_subsets(values, sign)
+        if self.number_type == 'fraction':
+            return ScaledTuple(values, scaled.denominator)
+        return values
+
+    def _from_subset_sums(self, values):
+        """Helper function for :meth:`get_mobius_transform` and
+        :meth:`get_zeta_transform`: construct a set function, with the
+        same storage as this one, from values indexed by event mask.
+        """
+        if self._array is not None:
+            result = SetFunction(pspace=self.pspace,
+                                 number_type=self.number_type, dense=True)
+            result._array[:] = values
+            return result
+        return SetFunction(
+            pspace=self.pspace,
+            data=dict(
+                (Event.from_mask(self.pspace, mask), value)
+                for mask, value in enumerate(values)),
+            number_type=self.number_type)
+
+    def get_mobius_transform(self):
+        """Calculate the Mobius transform of the set function on all
+        events at once; see :meth:`get_mobius`. This takes
+        :math:`O(n2^n)` operations, where :math:`n` is the size of the
+        possibility space, whereas calling :meth:`get_mobius` on every
+        event takes :math:`O(3^n)` operations.
+
+        :return: The Mobius transform.
+        :rtype: :class:`SetFunction`
+
+        .. warning::
+
+           The set function must be defined for all events.
+
+        >>> setfunc = SetFunction(pspace='ab', data={'': 0, 'a': 0.25, 'b': 0.3, 'ab': 1})
+        >>> print(setfunc.get_mobius_transform())
+            : 0.0
+        a   : 0.25
+          b : 0.3
+        a b : 0.45
+        >>> setfunc = SetFunction(
+        ...     pspace='abc',
+        ...     data={'': 0, 'a': '1/8', 'b': '1/7', 'c': '1/6',
+        ...           'ab': '1/3', 'ac': '1/2', 'bc': '2/5', 'abc': 1},
+        ...     number_type='fraction')
+        >>> inv = setfunc.get_mobius_transform()
+        >>> all(inv[event] == setfunc.get_mobius(event)
+        ...     for event in setfunc.pspace.subsets())
+        True
+        """
+        return self._from_subset_sums(self._get_subset_sums(-1))
+
+    def get_zeta_transform(self):
+        """Calculate the zeta transform (inverse Mobius transform) of
+        the set function on all events at once; see
+        :meth:`get_zeta`. This takes :math:`O(n2^n)` operations, where
+        :math:`n` is the size of the possibility space, whereas calling
+        :meth:`get_zeta` on every event takes :math:`O(3^n)`
+        operations.
+
+        :return: The zeta transform.
+        :rtype: :class:`SetFunction`
+
+        .. warning::
+
+           The set function must be defined for all events.
+
+        >>> setfunc = SetFunction(
+        ...     pspace='ab',
+        ...     data={'': 0, 'a': 0.25, 'b': 0.3, 'ab': 0.45})
+        >>> print(setfunc.get_zeta_transform())
+            : 0.0
+        a   : 0.25
+          b : 0.3
+        a b : 1.0
+        >>> setfunc = SetFunction(
+        ...     pspace='abc',
+        ...     data={'': 0, 'a': '1/8', 'b': '1/7', 'c': '1/6',
+        ...           'ab': '1/3', 'ac': '1/2', 'bc': '2/5', 'abc': 1},
+        ...     number_type='fraction')
+        >>> setfunc.get_zeta_transform().get_mobius_transform() == setfunc
+        True
+        """
+        return self._from_subset_sums(self._get_subset_sums(1))
 
     def get_choquet(self, gamble):
         """Calculate the Choquet integral of the given gamble.
@@ -258,8 +533,11 @@ class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
                ...
            KeyError: Event(pspace=PSpace(['a', 'b', 'c']), elements=set(['c']))
         """
-        result = 0
         gamble = self.make_gamble(gamble)
+        if self.number_type == 'fraction':
+            # integer arithmetic over common denominators
+            return self._get_choquet_exact(gamble._values)
+        result = 0
         # find values and level sets of the gamble
         gamble_inverse = collections.defaultdict(set)
         for key, value in gamble.iteritems():
@@ -274,6 +552,172 @@ class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
             event -= keys
         return result
 
+    def get_choquet_many(self, gambles):
+        """Calculate the Choquet integral of many gambles at once; see
+        :meth:`get_choquet`. This requires numpy.
+
+        :parameter gambles: The gambles, as a two-dimensional array,
+            with one row per gamble, and one column per element of the
+            possibility space (in the order of the possibility space).
+            Rows may also be given as :class:`~improb.Gamble` instances.
+        :type gambles: :class:`numpy.ndarray` or similar
+        :return: The Choquet integral of each row.
+        :rtype: :class:`numpy.ndarray`
+
+        Each row is sorted, after which the level sets are
+        constructed directly as event masks, and their values are
+        looked up (directly in the array, for dense storage; see
+        :meth:`as_array`). The results are identical to those of
+        :meth:`get_choquet`, also for the float number type.
+
+        >>> s = SetFunction(pspace='abc', data={'': 0,
+        ...                                     'a': 0, 'b': 0, 'c': 0,
+        ...                                     'ab': .5, 'bc': .5, 'ca': .5,
+        ...                                     'abc': 1})
+        >>> list(s.get_choquet_many([[1, 2, 3], [1, 2, 2], [1, 2, 1]]))
+        [1.5, 1.5, 1.0]
+        >>> import random
+        >>> random.seed(7)
+        >>> pspace = PSpace(5)
+        >>> gambles = [[random.randint(-3, 3) for omega in pspace]
+        ...            for i in xrange(50)]
+        >>> for number_type in ['float', 'fraction']:
+        ...     for dense in [False, True]:
+        ...         s = SetFunction(
+        ...             pspace=pspace,
+        ...             data=dict((event, random.randint(0, 10 * len(event)) / 7)
+        ...                       for event in pspace.subsets()),
+        ...             number_type=number_type, dense=dense)
+        ...         print(list(s.get_choquet_many(gambles))
+        ...               == [s.get_choquet(gamble) for gamble in gambles])
+        True
+        True
+        True
+        True
+
+        .. warning::
+
+           The set function must be defined for all level sets
+           induced by the argument gambles.
+
+           >>> s = SetFunction(pspace='abc', data={'ab': .5, 'bc': .5, 'ca': .5,
+           ...                                     'abc': 1}, dense=True)
+           >>> list(s.get_choquet_many([[1, 2, 2], [2, 2, 1], [-1, -1, -2]]))
+           [1.5, 1.5, -1.5]
+           >>> s.get_choquet_many([[1, 2, 3]])
+           Traceback (most recent call last):
+               ...
+           KeyError: Event(pspace=PSpace(['a', 'b', 'c']), elements=set(['c']))
+        """
+        if numpy is None:
+            raise ImportError("get_choquet_many requires numpy")
+        pspace = self.pspace
+        num_omega = len(pspace)
+        if self.number_type == 'float':
+            if isinstance(gambles, numpy.ndarray):
+                matrix = numpy.asarray(gambles, dtype=float)
+            else:
+                matrix = numpy.array(
+                    [self.make_gamble(gamble).values()
+                     if isinstance(gamble, collections.Mapping) else gamble
+                     for gamble in gambles],
+                    dtype=float)
+            if matrix.ndim != 2 or matrix.shape[1] != num_omega:
+                raise ValueError(
+                    "expected one row per gamble and one column per element")
+            return self._get_choquet_many_float(matrix)
+        else:
+            if isinstance(gambles, numpy.ndarray):
+                gambles = gambles.tolist()
+            return numpy.array(
+                [self._get_choquet_exact(
+                    self.make_gamble(gamble)._values
+                    if isinstance(gamble, collections.Mapping) else gamble)
+                 for gamble in gambles],
+                dtype=object)
+
+    def _get_choquet_many_float(self, matrix):
+        """Helper function for :meth:`get_choquet_many`, for the float
+        number type.
+        """
+        pspace = self.pspace
+        num_omega = len(pspace)
+        rows = numpy.arange(matrix.shape[0])[:, numpy.newaxis]
+        order = numpy.argsort(matrix, axis=1, kind='mergesort')
+        values = matrix[rows, order]
+        diffs = values.copy()
+        diffs[:, 1:] = values[:, 1:] - values[:, :-1]
+        # level set j consists of the elements at sorted positions j,
+        # j + 1, ..., n - 1; its mask is a reversed cumulative sum
+        if num_omega < 63:
+            bits = numpy.left_shift(1, order.astype(numpy.int64))
+        else:
+            bits = numpy.array(
+                [[1 << int(index) for index in row] for row in order],
+                dtype=object)
+        masks = numpy.cumsum(bits[:, ::-1], axis=1)[:, ::-1]
+        # only level sets with a nonzero increment contribute
+        needed = (diffs != 0)
+        if self._array is not None:
+            levels = self._array[masks]
+            undefined = numpy.isnan(levels) & needed
+            if undefined.any():
+                raise KeyError(
+                    Event.from_mask(pspace, int(masks[undefined][0])))
+            levels = numpy.where(needed, levels, 0)
+        else:
+            levels = numpy.zeros(matrix.shape, dtype=float)
+            for row, col in itertools.izip(*numpy.nonzero(needed)):
+                levels[row, col] = self[
+                    Event.from_mask(pspace, int(masks[row, col]))]
+        # accumulate column by column, so the summation order is the
+        # same as in get_choquet
+        result = numpy.zeros(matrix.shape[0], dtype=float)
+        for col in xrange(num_omega):
+            result += diffs[:, col] * levels[:, col]
+        return result
+
+    def _get_choquet_exact(self, row):
+        """Helper function for :meth:`get_choquet_many`, for the
+        fraction number type: integrate a single row, given as a
+        sequence in the order of the possibility space.
+
+        The row and the values of the level sets are scaled to
+        integers over a common denominator, so only a single fraction
+        is constructed, for the result.
+        """
+        pspace = self.pspace
+        if len(row) != len(pspace):
+            raise ValueError(
+                "expected one row per gamble and one column per element")
+        if not isinstance(row, ScaledTuple):
+            row = ScaledTuple.from_values(
+                self.make_number(value) for value in row)
+        numerators = row.numerators
+        mask = (1 << len(pspace)) - 1
+        diffs = []
+        levels = []
+        previous_value = 0
+        for index in sorted(xrange(len(numerators)),
+                            key=numerators.__getitem__):
+            value = numerators[index]
+            if value != previous_value:
+                if self._array is not None:
+                    level = self._array[mask]
+                    if level is None:
+                        raise KeyError(Event.from_mask(pspace, mask))
+                else:
+                    level = self[Event.from_mask(pspace, mask)]
+                diffs.append(value - previous_value)
+                levels.append(level)
+                previous_value = value
+            mask ^= 1 << index
+        levels = ScaledTuple.from_values(levels)
+        return self.make_number(ScaledTuple(
+            [sum(diff * level for diff, level
+                 in itertools.izip(diffs, levels.numerators))],
+            row.denominator * levels.denominator)[0])
+
     def get_bba_choquet(self, gamble):
         r"""Calculate the Choquet integral of the set function as a
         basic belief assignment.
@@ -334,14 +778,98 @@ class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
             if self.number_cmp(
                 sum(self[event] for event in self.pspace.subsets()), 1) != 0:
                 return False
-        # iterate over all constraints
-        for constraint in self.get_constraints_bba_n_monotone(
-            self.pspace, monotonicity):
-            # check the constraint
-            if self.number_cmp(
-                sum(self[event] for event in constraint)) < 0:
-                return False
-        return True
+        return self.get_bba_n_monotone_violation(monotonicity) is None
+
+    def get_bba_n_monotone_violation(self, monotonicity=None):
+        r"""Find a constraint for n-monotonicity, as returned by
+        :meth:`get_constraints_bba_n_monotone`, which the set
+        function, as basic belief assignment, violates.
+
+        :param monotonicity: Requested level of monotonicity.
+        :type monotonicity: :class:`int` or
+            :class:`collections.Iterable` of :class:`int`
+        :return: The events :math:`C` and :math:`A` of the first
+            violated constraint, or :const:`None` if all constraints
+            are satisfied.
+        :rtype: :class:`tuple` of two :class:`~improb.Event`, or
+            :const:`None`
+
+        For every :math:`C`, the sums over all intervals
+        :math:`\{B\colon C\subseteq B\subseteq A\}` are calculated
+        at once, by a zeta transform (see
+        :meth:`get_zeta_transform`) over the elements which are not
+        in :math:`C`. Constraints are checked by :math:`C`, in the
+        order of :meth:`~improb.PSpace.subset_masks`, and then by
+        mask of :math:`A`. For the float number type, this uses numpy
+        if it is installed; for the fraction number type, all
+        arithmetic is done on integers.
+
+        .. warning::
+
+           The set function must be defined for all events.
+
+        >>> bba = SetFunction(
+        ...     pspace='abc',
+        ...     data={'': 0, 'a': 0, 'b': 0, 'c': 0,
+        ...           'ab': '1/2', 'ac': '1/2', 'bc': '1/2', 'abc': '-1/2'},
+        ...     number_type='fraction')
+        >>> print(bba.get_bba_n_monotone_violation(xrange(1, 3)))
+        None
+        >>> event_c, event_a = bba.get_bba_n_monotone_violation(3)
+        >>> print(event_c.mask, event_a.mask)
+        7 7
+        >>> bba.is_bba_n_monotone(2), bba.is_bba_n_monotone(3)
+        (True, False)
+        """
+        pspace = self.pspace
+        size = 1 << len(pspace)
+        if self._array is not None:
+            defined = self._get_defined()
+            if not defined.all():
+                raise KeyError(Event.from_mask(
+                    pspace, int(numpy.flatnonzero(~defined)[0])))
+            values = self._array.tolist()
+        else:
+            values = [self[Event.from_mask(pspace, mask)]
+                      for mask in xrange(size)]
+        if self.number_type == 'fraction':
+            # the common denominator is positive, so the numerators
+            # determine the signs
+            values = ScaledTuple.from_values(values).numerators
+        if numpy is not None and (
+            self.number_type == 'float'
+            # integers must be small enough to avoid overflow
+            or max(abs(value) for value in values) < 2 ** (62 - len(pspace))):
+            values = numpy.array(
+                values,
+                dtype=float if self.number_type == 'float' else numpy.int64)
+            masks = numpy.arange(size, dtype=numpy.int64)
+        else:
+            masks = None
+        for mono in _get_monotonicities(monotonicity):
+            for mask_c in pspace.subset_masks(size=mono):
+                # the events A, as well as the events B, are C joined
+                # with a subset of the other elements; by listing these
+                # subsets in increasing order, the (compressed) index
+                # in this list is a mask over the other elements
+                if masks is not None:
+                    rests = masks[(masks & mask_c) == 0]
+                    sums = values[mask_c | rests]
+                    _add_subsets(sums)
+                    candidates = numpy.flatnonzero(sums < 0).tolist()
+                else:
+                    rests = [mask for mask in xrange(size)
+                             if not mask & mask_c]
+                    sums = [values[mask_c | rest] for rest in rests]
+                    _add_subsets(sums)
+                    candidates = (index for index, value in enumerate(sums)
+                                  if value < 0)
+                for index in candidates:
+                    if self.number_cmp(sums[index]) < 0:
+                        return (Event.from_mask(pspace, mask_c),
+                                Event.from_mask(pspace,
+                                                mask_c | int(rests[index])))
+        return None
 
     @classmethod
     def get_constraints_bba_n_monotone(cls, pspace, monotonicity=None):
@@ -446,36 +974,29 @@ class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
         0   0   0   0   0   0   0   1  
         """
         pspace = PSpace.make(pspace)
-        # check type
-        if monotonicity is None:
-            raise ValueError("specify monotonicity")
-        elif isinstance(monotonicity, collections.Iterable):
-            # special case: return it for all values in the iterable
-            for mono in monotonicity:
-                for constraint in cls.get_constraints_bba_n_monotone(pspace, mono):
-                    yield constraint
-            return
-        elif not isinstance(monotonicity, (int, long)):
-            raise TypeError("monotonicity must be integer")
-        # check value
-        if monotonicity < 0:
-            raise ValueError("specify a non-negative monotonicity")
-        if monotonicity == 0:
-            # don't return constraints in this case
-            return
         # yield all constraints
-        for event in pspace.subsets(size=xrange(monotonicity, len(pspace) + 1)):
-            for subevent in pspace.subsets(event, size=monotonicity):
-                yield pspace.subsets(event, contains=subevent)
+        for mono in _get_monotonicities(monotonicity):
+            for event in pspace.subsets(size=xrange(mono, len(pspace) + 1)):
+                for subevent in pspace.subsets(event, size=mono):
+                    yield pspace.subsets(event, contains=subevent)
 
     @classmethod
-    def make_extreme_bba_n_monotone(cls, pspace, monotonicity=None):
+    def make_extreme_bba_n_monotone(cls, pspace, monotonicity=None,
+                                    algorithm=None, expand=True):
         """Yield extreme basic belief assignments with given monotonicity.
 
-        .. warning::
-
-           Currently this doesn't work very well except for the cases
-           below.
+        :param pspace: The possibility space.
+        :type pspace: |pspacetype|
+        :param monotonicity: Requested level of monotonicity.
+        :type monotonicity: :class:`int`
+        :param algorithm: Either ``None`` or ``'cdd'`` to enumerate all
+            extreme points at once with cddlib, or ``'orbits'`` to
+            enumerate them modulo permutations of the possibility
+            space; see :func:`improb.symmetry.get_vertices`.
+        :type algorithm: :class:`str`
+        :param expand: For the ``'orbits'`` algorithm, whether to
+            yield all extreme points, or only one per orbit.
+        :type expand: :class:`bool`
 
         >>> bbas = list(SetFunction.make_extreme_bba_n_monotone('abc', monotonicity=2))
         >>> len(bbas)
@@ -518,43 +1039,92 @@ class SetFunction(collections.MutableMapping, cdd.NumberTypeable):
         True
         >>> all(bba.is_bba_n_monotone(4) for bba in bbas)
         True
-        >>> # cddlib hangs on larger possibility spaces
-        >>> #bbas = list(SetFunction.make_extreme_bba_n_monotone('abcde', monotonicity=2))
+        >>> bbas = list(SetFunction.make_extreme_bba_n_monotone(
+        ...     'abcd', monotonicity=3, algorithm='orbits'))
+        >>> len(bbas)
+        16
+        >>> bbas = list(SetFunction.make_extreme_bba_n_monotone(
+        ...     'abcd', monotonicity=3, algorithm='orbits', expand=False))
+        >>> len(bbas)
+        5
+        >>> all(bba.is_bba_n_monotone(3) for bba in bbas)
+        True
         """
         pspace = PSpace.make(pspace)
+        # column of every event
+        masks = list(pspace.subset_masks())
         # constraint for empty set and full set
         matrix = cdd.Matrix(
-            [[0] + [1 if event.is_false() else 0 for event in pspace.subsets()],
-             [-1] + [1 for event in pspace.subsets()]],
+            [[0] + [1 if mask == 0 else 0 for mask in masks],
+             [-1] + [1 for mask in masks]],
             linear=True,
             number_type='fraction')
         # constraints for monotonicity
-        constraints = [set(constraint) for constraint in
-                       cls.get_constraints_bba_n_monotone(
+        constraints = [set(event.mask for event in constraint)
+                       for constraint in cls.get_constraints_bba_n_monotone(
                            pspace, xrange(1, monotonicity + 1))]
-        matrix.extend([[0] + [1 if event in constraint else 0
-                              for event in pspace.subsets()]
+        matrix.extend([[0] + [1 if mask in constraint else 0
+                              for mask in masks]
                        for constraint in constraints])
         matrix.rep_type = cdd.RepType.INEQUALITY
-
-        # debug: simplify matrix
-        #print(pspace, monotonicity) # debug
-        ##print("original:", len(matrix))
-        #matrix.canonicalize()
-        #print("new     :", len(matrix))
-        #print(matrix) # debug
-
-        # calculate extreme points
-        poly = cdd.Polyhedron(matrix)
-        # convert these points back to lower probabilities
-        #print(poly.get_generators()) # debug
-        for vert in poly.get_generators():
+        # calculate extreme points, and convert them back to basic
+        # belief assignments
+        for vert in improb.symmetry.get_vertices(
+            matrix, improb.symmetry.get_mask_permutations(pspace, masks),
+            algorithm=algorithm, expand=expand):
             yield cls(
                 pspace=pspace,
-                data=dict((event, vert[1 + index])
-                           for index, event in enumerate(pspace.subsets())),
+                data=dict((Event.from_mask(pspace, mask), vert[rank])
+                          for rank, mask in enumerate(masks)),
                 number_type='fraction')
 
+def _add_subsets(values, sign=1):
+    r"""Replace *values*, indexed by event mask, in place by
+
+    .. math::
+
+       \sum_{B\subseteq A}\sigma^{|A\setminus B|}v(B)
+
+    where :math:`\sigma` is *sign* (either ``1`` or ``-1``), by the
+    butterfly recurrence described in
+    :meth:`SetFunction._get_subset_sums`. The values are either a
+    list or a :class:`numpy.ndarray`.
+    """
+    size = len(values)
+    step = 1
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        while step < size:
+            blocks = values.reshape(-1, 2, step)
+            blocks[:, 1, :] += sign * blocks[:, 0, :]
+            step <<= 1
+        return
+    while step < size:
+        for start in xrange(0, size, step << 1):
+            for low in xrange(start, start + step):
+                if sign > 0:
+                    values[low + step] += values[low]
+                else:
+                    values[low + step] -= values[low]
+        step <<= 1
+
+def _get_monotonicities(monotonicity):
+    """Check the *monotonicity* argument of the n-monotonicity
+    methods, and return it as a list of positive integers
+    (0-monotonicity has no constraints).
+    """
+    if monotonicity is None:
+        raise ValueError("specify monotonicity")
+    elif isinstance(monotonicity, collections.Iterable):
+        monotonicities = list(monotonicity)
+    else:
+        monotonicities = [monotonicity]
+    for mono in monotonicities:
+        if not isinstance(mono, (int, long)):
+            raise TypeError("monotonicity must be integer")
+        if mono < 0:
+            raise ValueError("specify a non-negative monotonicity")
+    return [mono for mono in monotonicities if mono > 0]
+
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
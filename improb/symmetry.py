@@ -0,0 +1,349 @@
+# improb is a Python module for working with imprecise probabilities
+# Copyright (c) 2008-2011, Matthias Troffaes
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+"""Vertex enumeration modulo symmetry.
+
+Many polytopes in imprecise probability theory, such as the set of
+all n-monotone lower probabilities, are invariant under permutations
+of the possibility space. Their vertices then come in orbits, and it
+suffices to find one representative of every orbit. This is done by
+adjacency decomposition: starting from a single vertex, the edges of
+every representative are followed to its neighbours, and only
+neighbours in new orbits are explored further. Only the cone of
+constraints which are tight at a vertex is handed to cddlib. This
+pays off as long as the vertices are not too degenerate: for
+instance, all 2-monotone lower probabilities on five elements are
+still out of reach, because of the vacuous lower probability, at
+which almost all constraints are tight.
+
+The symmetry group acts on the columns of the constraint matrix, and
+is given as a list of column permutations, for instance as returned
+by :func:`get_mask_permutations`. A vector ``v`` is mapped by a
+permutation ``perm`` to ``[v[i] for i in perm]``.
+"""
+
+from __future__ import division, absolute_import, print_function
+
+import cdd
+import collections
+import itertools
+
+from improb.scaled import ScaledTuple
+
+def get_mask_permutations(pspace, masks):
+    """Column permutations induced by all permutations of the
+    possibility space, for columns indexed by event masks.
+
+    :param pspace: The possibility space.
+    :type pspace: |pspacetype|
+    :param masks: The event mask of every column.
+    :type masks: :class:`list` of :class:`int`
+    :return: One column permutation for every permutation of the
+        possibility space, starting with the identity.
+    :rtype: :class:`list` of :class:`tuple` of :class:`int`
+
+    >>> from improb import PSpace
+    >>> pspace = PSpace('ab')
+    >>> masks = list(pspace.subset_masks())
+    >>> print(masks)
+    [0, 1, 2, 3]
+    >>> print(get_mask_permutations(pspace, masks))
+    [(0, 1, 2, 3), (0, 2, 1, 3)]
+    """
+    size = len(pspace)
+    columns = dict((mask, column) for column, mask in enumerate(masks))
+    perms = []
+    for images in itertools.permutations(xrange(size)):
+        # image of every mask, built from the mask without its lowest bit
+        table = [0] * (1 << size)
+        for mask in xrange(1, 1 << size):
+            low = mask & -mask
+            table[mask] = (table[mask ^ low]
+                           | (1 << images[low.bit_length() - 1]))
+        perms.append(tuple(columns[table[mask]] for mask in masks))
+    return perms
+
+def get_canonical(vector, perms):
+    """The lexicographically smallest image of *vector* under
+    *perms*, as a tuple. Two vectors are in the same orbit if and only
+    if their canonical forms are equal.
+
+    >>> perms = [(0, 1, 2), (1, 2, 0), (2, 0, 1)]
+    >>> print(get_canonical([3, 1, 2], perms))
+    (1, 2, 3)
+    """
+    return min(tuple(vector[i] for i in perm) for perm in perms)
+
+def get_orbit(vector, perms):
+    """Yield all distinct images of *vector* under *perms*, as tuples.
+
+    >>> perms = [(0, 1, 2), (1, 0, 2), (2, 1, 0)]
+    >>> print(sorted(get_orbit([0, 0, 1], perms)))
+    [(0, 0, 1), (1, 0, 0)]
+    """
+    seen = set()
+    for perm in perms:
+        image = tuple(vector[i] for i in perm)
+        if image not in seen:
+            seen.add(image)
+            yield image
+
+def get_reduced_matrix(matrix, perms):
+    """Remove redundant inequalities from the polytope *matrix*, which
+    must be invariant under the group of column permutations *perms*.
+    Redundancy is invariant under symmetry, so the inequalities are
+    processed one orbit at a time: an orbit is removed if its first
+    inequality is implied by the equalities and the inequalities
+    outside the orbit, which takes a single linear program per orbit.
+    Unlike :meth:`cdd.Matrix.canonicalize`, implicit equalities are
+    not detected, and the result need not be minimal within an orbit.
+
+    :param matrix: The polytope, in inequality representation.
+    :type matrix: :class:`cdd.Matrix`
+    :param perms: The column permutations.
+    :type perms: :class:`list` of :class:`tuple` of :class:`int`
+    :return: The reduced polytope, equalities first.
+    :rtype: :class:`cdd.Matrix`
+
+    >>> # the cube [0, 1]^2 with redundant constraints x + y <= 3
+    >>> # and x + y >= 0
+    >>> matrix = cdd.Matrix(
+    ...     [[0, 1, 0], [0, 0, 1], [1, -1, 0], [1, 0, -1], [3, -1, -1],
+    ...      [0, 1, 1]],
+    ...     number_type='fraction')
+    >>> matrix.rep_type = cdd.RepType.INEQUALITY
+    >>> print(get_reduced_matrix(matrix, [(0, 1), (1, 0)]))  # doctest: +NORMALIZE_WHITESPACE
+    H-representation
+    begin
+     4 3 rational
+     0 1 0
+     0 0 1
+     1 -1 0
+     1 0 -1
+    end
+    """
+    number_type = 'float' if matrix.number_type == 'float' else 'fraction'
+    equalities = []
+    rows = []
+    for i in xrange(matrix.row_size):
+        row = tuple(matrix.make_number(x) for x in matrix[i])
+        if i in matrix.lin_set:
+            equalities.append(row)
+        else:
+            rows.append(row)
+    orbits = []
+    assigned = set()
+    for row in rows:
+        if row not in assigned:
+            orbit = [row[:1] + image for image in get_orbit(row[1:], perms)]
+            assigned.update(orbit)
+            orbits.append(orbit)
+    kept = list(orbits)
+    for orbit in orbits:
+        others = [row for other in kept if other is not orbit
+                  for row in other]
+        if not equalities and not others:
+            # nothing left to imply the orbit
+            continue
+        linprog_matrix = cdd.Matrix(equalities + others,
+                                    number_type=number_type)
+        linprog_matrix.lin_set = frozenset(xrange(len(equalities)))
+        linprog_matrix.obj_type = cdd.LPObjType.MIN
+        linprog_matrix.obj_func = orbit[0]
+        linprog = cdd.LinProg(linprog_matrix)
+        linprog.solve()
+        if (linprog.status == cdd.LPStatusType.OPTIMAL
+            and matrix.number_cmp(linprog.obj_value) >= 0):
+            kept.remove(orbit)
+    result = cdd.Matrix(equalities + [row for orbit in kept for row in orbit],
+                        number_type=number_type)
+    result.lin_set = frozenset(xrange(len(equalities)))
+    result.rep_type = cdd.RepType.INEQUALITY
+    return result
+
+def _get_vertex(matrix):
+    """Find a vertex of the polytope *matrix* by solving a linear
+    program. The simplex method always ends in a basic solution, which
+    is a vertex.
+    """
+    matrix = matrix.copy()
+    matrix.obj_type = cdd.LPObjType.MIN
+    # distinct weights, to avoid ending at an arbitrary point of a
+    # degenerate face
+    matrix.obj_func = [0] + [i + 1 for i in xrange(matrix.col_size - 1)]
+    linprog = cdd.LinProg(matrix)
+    linprog.solve()
+    if linprog.status != cdd.LPStatusType.OPTIMAL:
+        raise ValueError("polytope is empty or unbounded")
+    return ScaledTuple.from_values(
+        matrix.make_number(x) for x in linprog.primal_solution)
+
+def _get_neighbours(rows, lin_set, vertex):
+    """Yield the neighbours of *vertex* in the polytope with integer
+    inequality *rows* and equalities *lin_set*, by enumerating the
+    extreme rays of the cone of constraints which are tight at
+    *vertex*, and following every such edge until it hits a
+    constraint which is not tight. The rows are given as pairs of the
+    constant and a list of (column, coefficient) pairs.
+    """
+    numerators = vertex.numerators
+    denominator = vertex.denominator
+    # slacks, multiplied by the denominator of the vertex
+    slacks = [constant * denominator
+              + sum(coeff * numerators[col] for col, coeff in coeffs)
+              for constant, coeffs in rows]
+    tight = [i for i, slack in enumerate(slacks)
+             if i in lin_set or slack == 0]
+    cone = []
+    for i in tight:
+        row = [0] * (len(vertex) + 1)
+        for col, coeff in rows[i][1]:
+            row[col + 1] = coeff
+        cone.append(row)
+    cone = cdd.Matrix(cone, number_type='fraction')
+    cone.lin_set = frozenset(index for index, i in enumerate(tight)
+                             if i in lin_set)
+    cone.rep_type = cdd.RepType.INEQUALITY
+    for generator in cdd.Polyhedron(cone).get_generators():
+        if generator[0] != 0:
+            # the vertex of the cone
+            continue
+        # any positive multiple of the ray will do
+        ray = ScaledTuple.from_values(
+            cone.make_number(x) for x in generator[1:]).numerators
+        # the step length is slack / (denominator * speed), minimized
+        # over all constraints which the ray decreases
+        step_slack, step_speed = None, None
+        for (constant, coeffs), slack in zip(rows, slacks):
+            if slack == 0:
+                continue
+            speed = -sum(coeff * ray[col] for col, coeff in coeffs)
+            if speed > 0 and (step_slack is None
+                              or slack * step_speed < step_slack * speed):
+                step_slack, step_speed = slack, speed
+        if step_slack is None:
+            raise ValueError("polytope is unbounded")
+        yield ScaledTuple(
+            [x * step_speed + step_slack * d
+             for x, d in zip(numerators, ray)],
+            denominator * step_speed)
+
+def get_vertex_orbits(matrix, perms):
+    """Yield one vertex of every orbit of the polytope *matrix* under
+    the group of column permutations *perms*. The permutations must
+    form a group, and must leave the polytope invariant. Every vertex
+    is the canonical form (see :func:`get_canonical`) of its orbit.
+    Arithmetic is exact, with integer numerators over a common
+    denominator.
+
+    :param matrix: The polytope, in inequality representation.
+    :type matrix: :class:`cdd.Matrix`
+    :param perms: The column permutations.
+    :type perms: :class:`list` of :class:`tuple` of :class:`int`
+    :return: The vertices, in order of discovery.
+    :rtype: iterator of :class:`~improb.scaled.ScaledTuple`
+
+    >>> # the cube [0, 1]^3 under permutations of its coordinates
+    >>> matrix = cdd.Matrix(
+    ...     [[0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1],
+    ...      [1, -1, 0, 0], [1, 0, -1, 0], [1, 0, 0, -1]],
+    ...     number_type='fraction')
+    >>> matrix.rep_type = cdd.RepType.INEQUALITY
+    >>> perms = list(itertools.permutations(xrange(3)))
+    >>> for vertex in get_vertex_orbits(matrix, perms):
+    ...     print(" ".join(str(x) for x in vertex))
+    0 0 0
+    0 0 1
+    0 1 1
+    1 1 1
+    """
+    if matrix.number_type != 'fraction':
+        raise ValueError("vertex orbits require the fraction number type")
+    rows = []
+    for i in xrange(matrix.row_size):
+        # positive multiples of inequalities are equivalent
+        row = ScaledTuple.from_values(
+            matrix.make_number(x) for x in matrix[i]).numerators
+        rows.append((row[0], [(col, coeff)
+                              for col, coeff in enumerate(row[1:])
+                              if coeff]))
+    lin_set = matrix.lin_set
+
+    def canonical(vertex):
+        return ScaledTuple._make(
+            get_canonical(vertex.numerators, perms), vertex.denominator)
+
+    start = canonical(_get_vertex(matrix))
+    seen = set([start])
+    queue = collections.deque([start])
+    while queue:
+        vertex = queue.popleft()
+        yield vertex
+        for neighbour in _get_neighbours(rows, lin_set, vertex):
+            neighbour = canonical(neighbour)
+            if neighbour not in seen:
+                seen.add(neighbour)
+                queue.append(neighbour)
+
+def get_vertices(matrix, perms, algorithm=None, expand=True):
+    """Yield the vertices of the polytope *matrix*, which must be
+    invariant under the group of column permutations *perms*.
+    Redundant inequalities are removed first by
+    :func:`get_reduced_matrix`.
+
+    :param matrix: The polytope, in inequality representation.
+    :type matrix: :class:`cdd.Matrix`
+    :param perms: The column permutations.
+    :type perms: :class:`list` of :class:`tuple` of :class:`int`
+    :param algorithm: Either ``None`` or ``'cdd'`` to enumerate all
+        vertices with cddlib, or ``'orbits'`` to find the vertices
+        orbit by orbit, with :func:`get_vertex_orbits`.
+    :type algorithm: :class:`str`
+    :param expand: For the ``'orbits'`` algorithm, whether to yield
+        the other vertices of every orbit, generated lazily right
+        after its representative, or only the representatives.
+    :type expand: :class:`bool`
+    :return: The vertices.
+    :rtype: iterator of sequences
+
+    >>> # the cube [0, 1]^3 under permutations of its coordinates
+    >>> matrix = cdd.Matrix(
+    ...     [[0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1],
+    ...      [1, -1, 0, 0], [1, 0, -1, 0], [1, 0, 0, -1]],
+    ...     number_type='fraction')
+    >>> matrix.rep_type = cdd.RepType.INEQUALITY
+    >>> perms = list(itertools.permutations(xrange(3)))
+    >>> len(list(get_vertices(matrix, perms)))
+    8
+    >>> len(list(get_vertices(matrix, perms, algorithm='orbits')))
+    8
+    >>> len(list(get_vertices(matrix, perms, algorithm='orbits', expand=False)))
+    4
+    """
+    matrix = get_reduced_matrix(matrix, perms)
+    if algorithm is None or algorithm == 'cdd':
+        for vertex in cdd.Polyhedron(matrix).get_generators():
+            yield vertex[1:]
+    elif algorithm == 'orbits':
+        for vertex in get_vertex_orbits(matrix, perms):
+            if expand:
+                for image in get_orbit(vertex.numerators, perms):
+                    yield ScaledTuple._make(image, vertex.denominator)
+            else:
+                yield vertex
+    else:
+        raise ValueError("invalid algorithm '{0}'".format(algorithm))